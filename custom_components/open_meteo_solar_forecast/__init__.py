@@ -3,34 +3,53 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
+from datetime import datetime, timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, ServiceCall, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+from open_meteo_solar_forecast.exceptions import OpenMeteoSolarForecastConfigError
 
 from .const import (
     CONF_AZIMUTH,
     CONF_DECLINATION,
     CONF_EFFICIENCY_FACTOR,
     CONF_HORIZON_FILEPATH,
+    CONF_HORIZON_TOLERANCE,
+    CONF_IMPORT_STATISTICS,
     CONF_MODULES_POWER,
     CONF_PARTIAL_SHADING,
     CONF_TRACKING,
     CONF_USE_HORIZON,
     CONF_MAX_SNOWCOVER_DEPTH_CM,
     DOMAIN,
+    LOGGER,
 )
 from .coordinator import (
+    META_STORAGE_VERSION,
     STORAGE_VERSION,
     OpenMeteoSolarForecastDataUpdateCoordinator,
-    checkHorizonFile,
+    meta_storage_key,
     storage_key,
 )
+from .horizon_cache import async_get_horizon_cache
+from .horizon_import import DEFAULT_TOLERANCE
+from .lookahead import LookaheadHorizons
+from .request_registry import async_get_request_registry
+from .services import async_setup_services
 
 PLATFORMS = [Platform.SENSOR]
 
+# How often the horizon files of running entries are checked for changes.
+HORIZON_POLL_INTERVAL = timedelta(minutes=1)
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 
 def _is_sequence(value: Any) -> bool:
     return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
@@ -90,8 +109,17 @@ def _normalize_option(value: Any, array_count: int, default: Any) -> list[Any]:
     return [value] * array_count
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Solar Forecast from a config entry."""
+async def _async_build_horizon_map(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    checked_horizon_by_path: dict[str, tuple[tuple[float, float], ...]],
+) -> tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]]:
+    """Build the horizon map of every array of an entry.
+
+    The horizon files come from the cache shared by all entries, which only
+    parses a file again when it changed; checked_horizon_by_path is set to
+    the maps of the files the entry uses.
+    """
     default_horizon_map: tuple[tuple[float, float], ...] = ((0.0, 0.0), (360.0, 0.0))
     default_horizon_path = "/config/custom_components/open_meteo_solar_forecast/horizon.txt"
 
@@ -107,32 +135,121 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         default=default_horizon_path,
     )
 
-    checked_horizon_by_path: dict[str, tuple[tuple[float, float], ...]] = {}
-    horizon_maps: list[tuple[tuple[float, float], ...]] = []
+    used_paths = list(
+        dict.fromkeys(
+            horizon_path
+            for use_horizon, horizon_path in zip(
+                use_horizon_values, horizon_paths, strict=True
+            )
+            if use_horizon
+        )
+    )
+    checked = await async_get_horizon_cache(hass).async_acquire(
+        entry.entry_id,
+        used_paths,
+        entry.options.get(CONF_HORIZON_TOLERANCE, DEFAULT_TOLERANCE),
+    )
+    checked_horizon_by_path.clear()
+    checked_horizon_by_path.update(checked)
+
+    horizon_maps = [
+        checked_horizon_by_path[horizon_path] if use_horizon else default_horizon_map
+        for use_horizon, horizon_path in zip(use_horizon_values, horizon_paths, strict=True)
+    ]
+
+    if array_count == 1:
+        return horizon_maps[0]
+    return horizon_maps
+
+
+@callback
+def _async_watch_horizon_files(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: OpenMeteoSolarForecastDataUpdateCoordinator,
+) -> CALLBACK_TYPE:
+    """Apply changes to the horizon files of a running entry.
+
+    The files are checked in the executor, where only files whose
+    modification time or size changed are parsed again. The forecast is
+    then recomputed from the weather data already fetched, keeping the
+    entities in place. An invalid file leaves the previous horizon in use.
+    """
+    checking = False
+    last_error = ""
+
+    async def _async_check(now: datetime) -> None:
+        nonlocal checking, last_error
+        if checking or coordinator.entry_changed():
+            return
+
+        checking = True
+        try:
+            previous = coordinator.horizon_maps_by_path
+            checked_horizon_by_path = dict(previous)
+            try:
+                horizon_map = await _async_build_horizon_map(
+                    hass, entry, checked_horizon_by_path
+                )
+            except ValueError as err:
+                if str(err) != last_error:
+                    last_error = str(err)
+                    LOGGER.warning("Keeping the previous horizon: %s", err)
+                return
+
+            last_error = ""
+            # Options changes apply the horizon files themselves.
+            if (
+                checked_horizon_by_path == previous
+                or coordinator.horizon_maps_by_path is not previous
+                or coordinator.entry_changed()
+            ):
+                return
+
+            LOGGER.debug("Horizon file changed, recomputing the forecast")
+            coordinator.horizon_maps_by_path = checked_horizon_by_path
+            await coordinator.async_apply_horizon(horizon_map)
+        finally:
+            checking = False
+
+    return async_track_time_interval(
+        hass,
+        _async_check,
+        HORIZON_POLL_INTERVAL,
+        name=f"{DOMAIN} horizon files {entry.entry_id}",
+    )
 
-    for use_horizon, horizon_path in zip(use_horizon_values, horizon_paths, strict=True):
-        if not use_horizon:
-            horizon_maps.append(default_horizon_map)
-            continue
 
-        if horizon_path not in checked_horizon_by_path:
-            checked_map, message = await hass.async_add_executor_job(
-                checkHorizonFile, horizon_path
+@callback
+def _async_update_horizon_watch(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: OpenMeteoSolarForecastDataUpdateCoordinator,
+) -> None:
+    """Watch the horizon files only while the entry uses any."""
+    if coordinator.horizon_maps_by_path:
+        if coordinator.unsub_horizon_watch is None:
+            coordinator.unsub_horizon_watch = _async_watch_horizon_files(
+                hass, entry, coordinator
             )
-            if checked_map is None:
-                raise ValueError(message)
-            checked_horizon_by_path[horizon_path] = checked_map
+    elif coordinator.unsub_horizon_watch is not None:
+        coordinator.unsub_horizon_watch()
+        coordinator.unsub_horizon_watch = None
 
-        horizon_maps.append(checked_horizon_by_path[horizon_path])
 
-    horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]]
-    if array_count == 1:
-        horizon_map = horizon_maps[0]
-    else:
-        horizon_map = horizon_maps
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services of the Open-Meteo Solar Forecast integration."""
+    async_setup_services(hass)
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Solar Forecast from a config entry."""
+    checked_horizon_by_path: dict[str, tuple[tuple[float, float], ...]] = {}
+    horizon_map = await _async_build_horizon_map(hass, entry, checked_horizon_by_path)
 
     coordinator = OpenMeteoSolarForecastDataUpdateCoordinator(
-        hass, entry, horizon_map
+        hass, entry, horizon_map, checked_horizon_by_path
     )
     await coordinator.async_config_entry_first_refresh()
 
@@ -156,6 +273,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_update_options))
+    _async_update_horizon_watch(hass, entry, coordinator)
+
+    @callback
+    def async_stop_horizon_watch() -> None:
+        """Stop watching the horizon files, if any are watched."""
+        if coordinator.unsub_horizon_watch is not None:
+            coordinator.unsub_horizon_watch()
+            coordinator.unsub_horizon_watch = None
+
+    entry.async_on_unload(async_stop_horizon_watch)
+
+    if coordinator.import_statistics:
+        # Imported here, as it loads the recorder, which is only needed then.
+        from .statistics import ForecastStatistics
+
+        statistics = ForecastStatistics(hass, entry.entry_id, entry.title)
+
+        @callback
+        def async_import_statistics() -> None:
+            """Import the forecast into long-term statistics after each update."""
+            if coordinator.data is not None:
+                entry.async_create_background_task(
+                    hass,
+                    statistics.async_import(coordinator.data),
+                    f"{DOMAIN} statistics import {entry.entry_id}",
+                )
+
+        entry.async_on_unload(coordinator.async_add_listener(async_import_statistics))
+        async_import_statistics()
 
     return True
 
@@ -165,6 +311,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_get_horizon_cache(hass).async_release(entry.entry_id)
+        async_get_request_registry(hass).async_release(entry.entry_id)
 
     return unload_ok
 
@@ -172,8 +320,47 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Remove the retained forecast storage for a removed config entry."""
     await Store(hass, STORAGE_VERSION, storage_key(entry.entry_id)).async_remove()
+    await Store(
+        hass, META_STORAGE_VERSION, meta_storage_key(entry.entry_id)
+    ).async_remove()
 
 
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Update options."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Update options.
+
+    Changes are applied to the running coordinator, so entities stay in place
+    and the forecast is recomputed from the weather data already fetched. Only
+    changes to the set of entities (number of arrays, look-ahead sensors),
+    turning the statistics import on or off or a configuration that cannot
+    be applied in place reload the entry.
+    """
+    coordinator: OpenMeteoSolarForecastDataUpdateCoordinator = hass.data[DOMAIN][
+        entry.entry_id
+    ]
+    if not coordinator.entry_changed():
+        return
+
+    try:
+        if _resolve_array_count(entry) != coordinator.array_count:
+            raise ValueError("Number of arrays changed")
+        if (
+            LookaheadHorizons.from_options(entry.options).sensor_keys
+            != coordinator.horizons.sensor_keys
+        ):
+            raise ValueError("Look-ahead sensors changed")
+        if (
+            entry.options.get(CONF_IMPORT_STATISTICS, False)
+            != coordinator.import_statistics
+        ):
+            raise ValueError("Statistics import changed")
+        # Work on a copy so a failing horizon file leaves the coordinator as is.
+        checked_horizon_by_path = dict(coordinator.horizon_maps_by_path)
+        horizon_map = await _async_build_horizon_map(
+            hass, entry, checked_horizon_by_path
+        )
+        coordinator.horizon_maps_by_path = checked_horizon_by_path
+        _async_update_horizon_watch(hass, entry, coordinator)
+        await coordinator.async_apply_options(horizon_map)
+    except (ValueError, OpenMeteoSolarForecastConfigError):
+        # Let setup validate the new configuration and report any errors.
+        await hass.config_entries.async_reload(entry.entry_id)
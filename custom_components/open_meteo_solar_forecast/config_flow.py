@@ -20,24 +20,39 @@ from homeassistant.helpers.selector import (
 )
 
 from .const import (
+    ATTRIBUTE_MODE_FULL,
+    ATTRIBUTE_MODES,
+    CONF_ADAPTIVE_REFRESH,
     CONF_ARRAY_INVERTER_POWER,
+    CONF_ATTRIBUTE_MAX_POINTS,
+    CONF_ATTRIBUTE_MODE,
     CONF_AZIMUTH,
     CONF_BASE_URL,
     CONF_DAMPING_EVENING,
     CONF_DAMPING_MORNING,
     CONF_DECLINATION,
     CONF_EFFICIENCY_FACTOR,
+    CONF_ENERGY_RESOLUTION,
+    CONF_ENERGY_WINDOWS,
+    CONF_IMPORT_STATISTICS,
     CONF_INVERTER_POWER,
     CONF_MODEL,
     CONF_USE_HORIZON,
     CONF_PARTIAL_SHADING,
     CONF_HORIZON_FILEPATH,
+    CONF_HORIZON_TOLERANCE,
     CONF_MAX_SNOWCOVER_DEPTH_CM,
     CONF_MODULES_POWER,
+    CONF_POWER_OFFSETS,
     CONF_TRACKING,
+    DEFAULT_ATTRIBUTE_MAX_POINTS,
     DOMAIN,
+    ENERGY_RESOLUTION_HOUR,
+    ENERGY_RESOLUTIONS,
     TRACKING_OPTIONS,
 )
+from .horizon_import import DEFAULT_TOLERANCE
+from .lookahead import validate_horizons
 
 try:
     from homeassistant.config_entries import ConfigFlowResult  # >=2024.4.0b0
@@ -50,6 +65,16 @@ DEFAULT_HORIZON_FILEPATH = (
     "/config/custom_components/open_meteo_solar_forecast/horizon.txt"
 )
 
+HORIZON_TOLERANCE_SELECTOR = NumberSelector(
+    NumberSelectorConfig(
+        min=0,
+        max=10,
+        step=0.1,
+        mode=NumberSelectorMode.BOX,
+        unit_of_measurement="°",
+    )
+)
+
 # Fields that can differ per PV array. Stored as a scalar for a single array
 # and as equal-length lists for multi-array setups (the format the
 # coordinator already understands).
@@ -184,6 +209,81 @@ def _array_schema(defaults: dict[str, Any], add_another_default: bool) -> vol.Sc
     )
 
 
+# Suggestions for the look-ahead options; any other duration can be typed in.
+POWER_OFFSET_SUGGESTIONS = ["2h", "3h", "4h", "6h"]
+ENERGY_WINDOW_SUGGESTIONS = ["2h", "4h", "6h", "12h", "24h"]
+
+
+def _lookahead_fields(options: dict[str, Any]) -> dict[vol.Marker, Any]:
+    """Return the schema fields of the look-ahead sensor options."""
+    return {
+        vol.Optional(
+            CONF_POWER_OFFSETS, default=options.get(CONF_POWER_OFFSETS, [])
+        ): SelectSelector(
+            SelectSelectorConfig(
+                options=POWER_OFFSET_SUGGESTIONS,
+                multiple=True,
+                custom_value=True,
+                mode=SelectSelectorMode.DROPDOWN,
+            )
+        ),
+        vol.Optional(
+            CONF_ENERGY_WINDOWS, default=options.get(CONF_ENERGY_WINDOWS, [])
+        ): SelectSelector(
+            SelectSelectorConfig(
+                options=ENERGY_WINDOW_SUGGESTIONS,
+                multiple=True,
+                custom_value=True,
+                mode=SelectSelectorMode.DROPDOWN,
+            )
+        ),
+    }
+
+
+def _attribute_fields(options: dict[str, Any]) -> dict[vol.Marker, Any]:
+    """Return the schema fields of the sensor attribute options."""
+    return {
+        vol.Optional(
+            CONF_ATTRIBUTE_MODE,
+            default=options.get(CONF_ATTRIBUTE_MODE, ATTRIBUTE_MODE_FULL),
+        ): SelectSelector(
+            SelectSelectorConfig(
+                options=list(ATTRIBUTE_MODES),
+                mode=SelectSelectorMode.DROPDOWN,
+                translation_key="attribute_mode",
+            )
+        ),
+        vol.Optional(
+            CONF_ATTRIBUTE_MAX_POINTS,
+            default=options.get(
+                CONF_ATTRIBUTE_MAX_POINTS, DEFAULT_ATTRIBUTE_MAX_POINTS
+            ),
+        ): vol.All(
+            NumberSelector(
+                NumberSelectorConfig(min=1, max=96, step=1, mode=NumberSelectorMode.BOX)
+            ),
+            vol.Coerce(int),
+        ),
+    }
+
+
+def _energy_resolution_selector() -> SelectSelector:
+    return SelectSelector(
+        SelectSelectorConfig(
+            options=list(ENERGY_RESOLUTIONS),
+            mode=SelectSelectorMode.DROPDOWN,
+            translation_key="energy_resolution",
+        )
+    )
+
+
+def _lookahead_errors(user_input: dict[str, Any]) -> dict[str, str]:
+    return validate_horizons(
+        user_input.get(CONF_POWER_OFFSETS, []),
+        user_input.get(CONF_ENERGY_WINDOWS, []),
+    )
+
+
 def _normalize_array_input(user_input: dict[str, Any]) -> dict[str, Any]:
     array = {key: user_input.get(key) for key in PER_ARRAY_KEYS}
     filepath = str(array[CONF_HORIZON_FILEPATH] or "").strip()
@@ -251,13 +351,16 @@ class OpenMeteoSolarForecastFlowHandler(ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle the common settings."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            self._common = user_input
-            self._arrays = []
-            return await self.async_step_array()
+            if not (errors := _lookahead_errors(user_input)):
+                self._common = user_input
+                self._arrays = []
+                return await self.async_step_array()
 
         return self.async_show_form(
             step_id="user",
+            errors=errors,
             data_schema=vol.Schema(
                 {
                     vol.Required(
@@ -287,6 +390,20 @@ class OpenMeteoSolarForecastFlowHandler(ConfigFlow, domain=DOMAIN):
                             unit_of_measurement="cm",
                         )
                     ),
+                    vol.Optional(
+                        CONF_HORIZON_TOLERANCE, default=DEFAULT_TOLERANCE
+                    ): HORIZON_TOLERANCE_SELECTOR,
+                    vol.Optional(
+                        CONF_ADAPTIVE_REFRESH, default=False
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_IMPORT_STATISTICS, default=False
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_ENERGY_RESOLUTION, default=ENERGY_RESOLUTION_HOUR
+                    ): _energy_resolution_selector(),
+                    **_lookahead_fields({}),
+                    **_attribute_fields({}),
                 }
             ),
         )
@@ -316,6 +433,26 @@ class OpenMeteoSolarForecastFlowHandler(ConfigFlow, domain=DOMAIN):
                     CONF_MAX_SNOWCOVER_DEPTH_CM: self._common[
                         CONF_MAX_SNOWCOVER_DEPTH_CM
                     ],
+                    CONF_HORIZON_TOLERANCE: self._common.get(
+                        CONF_HORIZON_TOLERANCE, DEFAULT_TOLERANCE
+                    ),
+                    CONF_ADAPTIVE_REFRESH: self._common.get(
+                        CONF_ADAPTIVE_REFRESH, False
+                    ),
+                    CONF_IMPORT_STATISTICS: self._common.get(
+                        CONF_IMPORT_STATISTICS, False
+                    ),
+                    CONF_ENERGY_RESOLUTION: self._common.get(
+                        CONF_ENERGY_RESOLUTION, ENERGY_RESOLUTION_HOUR
+                    ),
+                    CONF_POWER_OFFSETS: self._common.get(CONF_POWER_OFFSETS, []),
+                    CONF_ENERGY_WINDOWS: self._common.get(CONF_ENERGY_WINDOWS, []),
+                    CONF_ATTRIBUTE_MODE: self._common.get(
+                        CONF_ATTRIBUTE_MODE, ATTRIBUTE_MODE_FULL
+                    ),
+                    CONF_ATTRIBUTE_MAX_POINTS: self._common.get(
+                        CONF_ATTRIBUTE_MAX_POINTS, DEFAULT_ATTRIBUTE_MAX_POINTS
+                    ),
                     **{key: per_array[key] for key in PER_ARRAY_KEYS},
                 },
             )
@@ -345,15 +482,18 @@ class OpenMeteoSolarForecastOptionFlowHandler(OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle the common settings."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            self._common = user_input
-            self._arrays = []
-            self._stored_arrays = _expand_arrays(self.config_entry)
-            return await self.async_step_array()
+            if not (errors := _lookahead_errors(user_input)):
+                self._common = user_input
+                self._arrays = []
+                self._stored_arrays = _expand_arrays(self.config_entry)
+                return await self.async_step_array()
 
         options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
+            errors=errors,
             data_schema=vol.Schema(
                 {
                     vol.Optional(
@@ -395,6 +535,26 @@ class OpenMeteoSolarForecastOptionFlowHandler(OptionsFlow):
                             unit_of_measurement="cm",
                         )
                     ),
+                    vol.Optional(
+                        CONF_HORIZON_TOLERANCE,
+                        default=options.get(CONF_HORIZON_TOLERANCE, DEFAULT_TOLERANCE),
+                    ): HORIZON_TOLERANCE_SELECTOR,
+                    vol.Optional(
+                        CONF_ADAPTIVE_REFRESH,
+                        default=options.get(CONF_ADAPTIVE_REFRESH, False),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_IMPORT_STATISTICS,
+                        default=options.get(CONF_IMPORT_STATISTICS, False),
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_ENERGY_RESOLUTION,
+                        default=options.get(
+                            CONF_ENERGY_RESOLUTION, ENERGY_RESOLUTION_HOUR
+                        ),
+                    ): _energy_resolution_selector(),
+                    **_lookahead_fields(options),
+                    **_attribute_fields(options),
                 }
             ),
         )
@@ -420,6 +580,26 @@ class OpenMeteoSolarForecastOptionFlowHandler(OptionsFlow):
                     CONF_MAX_SNOWCOVER_DEPTH_CM: self._common[
                         CONF_MAX_SNOWCOVER_DEPTH_CM
                     ],
+                    CONF_HORIZON_TOLERANCE: self._common.get(
+                        CONF_HORIZON_TOLERANCE, DEFAULT_TOLERANCE
+                    ),
+                    CONF_ADAPTIVE_REFRESH: self._common.get(
+                        CONF_ADAPTIVE_REFRESH, False
+                    ),
+                    CONF_IMPORT_STATISTICS: self._common.get(
+                        CONF_IMPORT_STATISTICS, False
+                    ),
+                    CONF_ENERGY_RESOLUTION: self._common.get(
+                        CONF_ENERGY_RESOLUTION, ENERGY_RESOLUTION_HOUR
+                    ),
+                    CONF_POWER_OFFSETS: self._common.get(CONF_POWER_OFFSETS, []),
+                    CONF_ENERGY_WINDOWS: self._common.get(CONF_ENERGY_WINDOWS, []),
+                    CONF_ATTRIBUTE_MODE: self._common.get(
+                        CONF_ATTRIBUTE_MODE, ATTRIBUTE_MODE_FULL
+                    ),
+                    CONF_ATTRIBUTE_MAX_POINTS: self._common.get(
+                        CONF_ATTRIBUTE_MAX_POINTS, DEFAULT_ATTRIBUTE_MAX_POINTS
+                    ),
                     **{key: per_array[key] for key in PER_ARRAY_KEYS},
                 },
             )
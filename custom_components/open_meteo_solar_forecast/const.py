@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
 import logging
 
 DOMAIN = "open_meteo_solar_forecast"
 LOGGER = logging.getLogger(__package__)
 
+# Resolution of the forecast series.
+FORECAST_SLOT = timedelta(minutes=15)
+
 CONF_BASE_URL = "base_url"
 CONF_DECLINATION = "declination"
 CONF_AZIMUTH = "azimuth"
@@ -22,8 +26,38 @@ TRACKING_OPTIONS = ("none", "azimuth", "tilt", "dual")
 CONF_USE_HORIZON = "use_horizon"
 CONF_PARTIAL_SHADING = "partial_shading"
 CONF_HORIZON_FILEPATH = "horizon_filepath"
+CONF_HORIZON_TOLERANCE = "horizon_tolerance"
 CONF_MAX_SNOWCOVER_DEPTH_CM = "max_snowcover_depth_cm"
 CONF_MODEL = "model"
+CONF_ADAPTIVE_REFRESH = "adaptive_refresh"
+CONF_POWER_OFFSETS = "power_offsets"
+CONF_ENERGY_WINDOWS = "energy_windows"
+CONF_ATTRIBUTE_MODE = "attribute_mode"
+CONF_ATTRIBUTE_MAX_POINTS = "attribute_max_points"
+CONF_IMPORT_STATISTICS = "import_statistics"
+CONF_ENERGY_RESOLUTION = "energy_resolution"
+
+# Which forecast series the daily energy sensors have as attributes.
+ATTRIBUTE_MODE_FULL = "full"
+ATTRIBUTE_MODE_HOURLY = "hourly"
+ATTRIBUTE_MODE_DOWNSAMPLED = "downsampled"
+ATTRIBUTE_MODE_NONE = "none"
+ATTRIBUTE_MODES = (
+    ATTRIBUTE_MODE_FULL,
+    ATTRIBUTE_MODE_HOURLY,
+    ATTRIBUTE_MODE_DOWNSAMPLED,
+    ATTRIBUTE_MODE_NONE,
+)
+DEFAULT_ATTRIBUTE_MAX_POINTS = 24
+
+# Resolution of the forecast provided to the energy dashboard.
+ENERGY_RESOLUTION_HOUR = "1h"
+ENERGY_RESOLUTION_15M = "15m"
+ENERGY_RESOLUTIONS = (ENERGY_RESOLUTION_HOUR, ENERGY_RESOLUTION_15M)
+
+# Shared by all config entries, next to the coordinators in hass.data[DOMAIN].
+DATA_REQUEST_REGISTRY = f"{DOMAIN}_request_registry"
+DATA_HORIZON_CACHE = f"{DOMAIN}_horizon_cache"
 
 ATTR_WATTS = "watts"
 ATTR_WH_PERIOD = "wh_period"
@@ -4,41 +4,67 @@ from __future__ import annotations
 
 import asyncio
 import json
-from collections.abc import Sequence
-from datetime import date, datetime, timedelta, timezone
+from collections.abc import Hashable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone, tzinfo
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
-from open_meteo_solar_forecast import Estimate, OpenMeteoSolarForecast
+from open_meteo_solar_forecast import OpenMeteoSolarForecast
 
 from .const import (
+    ATTRIBUTE_MODE_FULL,
+    CONF_ADAPTIVE_REFRESH,
     CONF_ARRAY_INVERTER_POWER,
+    CONF_ATTRIBUTE_MAX_POINTS,
+    CONF_ATTRIBUTE_MODE,
     CONF_AZIMUTH,
     CONF_BASE_URL,
     CONF_DAMPING_EVENING,
     CONF_DAMPING_MORNING,
     CONF_DECLINATION,
     CONF_EFFICIENCY_FACTOR,
+    CONF_ENERGY_RESOLUTION,
+    CONF_ENERGY_WINDOWS,
+    CONF_IMPORT_STATISTICS,
     CONF_INVERTER_POWER,
     CONF_USE_HORIZON,
     CONF_PARTIAL_SHADING,
     CONF_MAX_SNOWCOVER_DEPTH_CM,
     CONF_MODEL,
     CONF_MODULES_POWER,
+    CONF_POWER_OFFSETS,
     CONF_TRACKING,
+    DEFAULT_ATTRIBUTE_MAX_POINTS,
     DOMAIN,
+    ENERGY_RESOLUTION_HOUR,
     LOGGER,
 )
+from .engine import build_array_estimates, build_estimate, compute_power
+from .horizon import HorizonProfile
+from .horizon_cache import async_get_horizon_cache
+from .lookahead import LookaheadHorizons
+from .metrics import Metrics
+from .models import IndexedEstimate
+from .retained import pack_estimate, payload_digest, unpack_estimate
+from .request_registry import ForecastRequestRegistry, async_get_request_registry
+from .scheduler import (
+    DEFAULT_UPDATE_INTERVAL,
+    MIN_UPDATE_INTERVAL,
+    AdaptiveRefresh,
+    ModelRunSchedule,
+    forecast_volatility,
+)
+from .ticks import TickScheduler
 
-import numpy
-
-STORAGE_VERSION = 2
+STORAGE_VERSION = 4
+META_STORAGE_VERSION = 1
 
 
 class RetainedForecastStore(Store[dict[str, Any]]):
@@ -53,32 +79,186 @@ class RetainedForecastStore(Store[dict[str, Any]]):
 # unreachable API can hang a refresh (and config entry setup) indefinitely.
 API_TIMEOUT_SECONDS = 60
 
+FORECAST_URI = "/v1/forecast"
+
+
+@dataclass
+class SharedOpenMeteoSolarForecast(OpenMeteoSolarForecast):
+    """Forecast client that shares identical weather requests between entries.
+
+    The weather data of every array is requested separately. Routing those
+    requests through the registry lets entries with the same location,
+    orientation and model reuse a single fetch, while each entry still
+    applies its own array parameters to it (see engine.py).
+    """
+
+    request_registry: ForecastRequestRegistry | None = None
+    metrics: Metrics | None = None
+
+    def _request_key(self, uri: str, params: dict[str, Any] | None) -> Hashable:
+        # The library adds the API key and weather model to the parameters
+        # itself, so they have to be part of the key as well.
+        return (
+            self.base_url,
+            uri,
+            self.api_key,
+            self.weather_model,
+            frozenset((params or {}).items()),
+        )
+
+    def array_params(self) -> list[dict[str, str]]:
+        """Return the weather request parameters of every array.
+
+        These mirror the parameters the library sends for each array, so
+        entries still using the library's own estimate() share the requests.
+        """
+        return [
+            {
+                "latitude": str(latitude),
+                "longitude": str(longitude),
+                "azimuth": "nan" if tracking in ("azimuth", "dual") else str(azimuth),
+                "tilt": "nan" if tracking in ("tilt", "dual") else str(declination),
+                "minutely_15": "temperature_2m"
+                ",global_tilted_irradiance,global_tilted_irradiance_instant,diffuse_radiation,diffuse_radiation_instant,direct_radiation,direct_radiation_instant,snow_depth",
+                "daily": "sunrise,sunset",
+                "forecast_days": str(self.forecast_days),
+                "past_days": str(self.past_days),
+                "timezone": "auto",
+                "timeformat": "unixtime",
+            }
+            for latitude, longitude, azimuth, declination, tracking in zip(
+                self.latitude,
+                self.longitude,
+                self.azimuth,
+                self.declination,
+                self.tracking,
+                strict=True,
+            )
+        ]
+
+    def request_keys(self) -> list[Hashable]:
+        """Return the registry keys of the weather request of every array."""
+        return [
+            self._request_key(FORECAST_URI, params) for params in self.array_params()
+        ]
+
+    async def async_fetch(self) -> list[Any]:
+        """Fetch the weather data of every array without processing it."""
+        return list(
+            await asyncio.gather(
+                *(
+                    self._request(FORECAST_URI, params=params)
+                    for params in self.array_params()
+                )
+            )
+        )
+
+    def cached_responses(self) -> tuple[datetime, list[Any]] | None:
+        """Return the latest weather data of every array from the registry.
+
+        The fetch time of the oldest response is returned with them, or None
+        if the data of any array is not cached.
+        """
+        if self.request_registry is None:
+            return None
+
+        cached = [
+            self.request_registry.async_get_cached(key) for key in self.request_keys()
+        ]
+        if any(item is None for item in cached):
+            return None
+        return min(fetched for fetched, _ in cached), [
+            response for _, response in cached
+        ]
+
+    async def _request(
+        self,
+        uri: str,
+        *,
+        params: dict[str, Any] | None = None,
+    ) -> Any:
+        """Handle a request to the API through the shared request registry."""
+        if self.request_registry is None:
+            return await super()._request(uri, params=params)
+
+        key = self._request_key(uri, params)
+
+        request = super()._request
+
+        async def _fetch() -> Any:
+            if self.metrics is None:
+                async with asyncio.timeout(API_TIMEOUT_SECONDS):
+                    return await request(uri, params=params)
+
+            with self.metrics.timed(self.metrics.http_latency):
+                async with asyncio.timeout(API_TIMEOUT_SECONDS):
+                    response = await request(uri, params=params)
+            self.metrics.record_response(response)
+            return response
+
+        return await self.request_registry.async_request(key, _fetch)
+
 
 def storage_key(entry_id: str) -> str:
     """Return the storage key for the retained forecast of a config entry."""
     return f"{DOMAIN}.{entry_id}"
 
 
+def meta_storage_key(entry_id: str) -> str:
+    """Return the storage key for the freshness record of a retained forecast."""
+    return f"{DOMAIN}.{entry_id}.meta"
+
+
+# Options that only affect when the forecast is refreshed or which sensors
+# exist and what they show, not the forecast values.
+_FINGERPRINT_EXCLUDED_KEYS = {
+    CONF_ADAPTIVE_REFRESH,
+    CONF_ATTRIBUTE_MAX_POINTS,
+    CONF_ATTRIBUTE_MODE,
+    CONF_ENERGY_RESOLUTION,
+    CONF_ENERGY_WINDOWS,
+    CONF_IMPORT_STATISTICS,
+    CONF_POWER_OFFSETS,
+}
+
+
 def _config_fingerprint(entry: ConfigEntry) -> str:
     """Fingerprint the settings that affect forecast values.
 
     A retained forecast computed with a different configuration (e.g. changed
     azimuth or panel power) must not be served after an options reload.
     """
-    values = {**entry.data, **entry.options}
+    values = {
+        key: value
+        for key, value in {**entry.data, **entry.options}.items()
+        if key not in _FINGERPRINT_EXCLUDED_KEYS
+    }
     return json.dumps(values, sort_keys=True, default=str)
 
 
-def _datetime_dict_to_json(data: dict[datetime, int]) -> dict[str, int]:
-    return {timestamp.isoformat(): value for timestamp, value in data.items()}
+def _compute_indexed_estimate(
+    forecast: OpenMeteoSolarForecast,
+    responses: list[Any],
+    profiles: list[HorizonProfile] | None = None,
+) -> IndexedEstimate:
+    power = compute_power(forecast, responses, profiles)
+    return IndexedEstimate.from_estimate(
+        build_estimate(forecast, *power), build_array_estimates(forecast, *power)
+    )
 
 
-def _datetime_dict_from_json(data: dict[str, int]) -> dict[datetime, int]:
-    return {datetime.fromisoformat(timestamp): value for timestamp, value in data.items()}
+def _run_signature(response: Any) -> Any:
+    """Return the parts of a weather response that identify the model run.
 
-
-def _date_dict_from_json(data: dict[str, int]) -> dict[date, int]:
-    return {date.fromisoformat(day): value for day, value in data.items()}
+    Responses of the same run only differ in bookkeeping such as the
+    generation time, so comparing the data itself tells whether a new run
+    was published since the previous fetch.
+    """
+    return (
+        response.get("utc_offset_seconds"),
+        response.get("minutely_15"),
+        response.get("daily"),
+    )
 
 
 def _is_sequence(value: Any) -> bool:
@@ -128,60 +308,114 @@ def _entry_value(entry: ConfigEntry, key: str) -> Any:
     """Get config value from options with fallback to entry data."""
     return entry.options.get(key, entry.data.get(key))
 
-def checkHorizonFile(horizon_filepath):
-    horizon_data_valid = True
-    message = ""
-    
-    try:
-        open(horizon_filepath)
-    except FileNotFoundError:
-        horizon_data_valid = False
-        message = "Invalid horizon file: Horizon file '" + horizon_filepath + "' not found! Specify path like e.g. '/config/www/horizon.txt'"
-    
-    if horizon_data_valid:
-        horizon_data = numpy.genfromtxt(horizon_filepath , delimiter="\t", dtype=float)
-        hm = ((0,90),(360,90))
-        
-        # ... check array shape (error)
-        sh = horizon_data.shape
-        if isinstance(sh, tuple) and len(sh) == 2:
-            if sh[0] < 2 or not sh[1] == 2:
-                horizon_data_valid = False
-                message = "Invalid horizon file: The array shape is " + str(sh) + ", which is invalid. It has to be at least two rows and exactly two columns (N>1 , 2). Please check (two columns, tab delimiter, decimal points)."
-            else:
-                hm = tuple([tuple(row) for row in horizon_data])
-        else:
-            horizon_data_valid = False
-            message = "Invalid horizon file: The array shape cannot be determined. It has to be at least two rows and exactly two columns (N>1 , 2). Please check (two columns, tab delimiter, decimal points)."
-        
-        # ... check for floats (error) - via valid sum of floats or NaN
-        if numpy.isnan(numpy.sum(hm)):
-            horizon_data_valid = False
-            message = "Invalid horizon file: The data seems to contain non-float values. Please check (two columns, tab delimiter, decimal points)."
-        
-        # ... check range 0...360° (warning only)
-        if horizon_data_valid:
-            hm_0 = int(hm[0][0])
-            hm_n = int(hm[-1][0])
-            if not hm_0 == 0 or not hm_n == 360:
-                horizon_data_valid = False
-                message = "Invalid horizon file: Azimuth values (" + str(hm_0) + "° to " + str(hm_n) + "°) do not contain 0° and/or 360°. I cannot judge whether the full range of applicable azimuths is covered by the horizon file. Please check..."
-            
-            # ... check ascending azimuths (warning only)
-            n = sh[0]
-            for i in range(1,n):
-                a1 = horizon_data[i-1][0]
-                a2 = horizon_data[i][0]
-                if not (a2 > a1):
-                    message = "Invalid horizon file: Azimuth values are not ascending around value of " + str(a1) + ". Please check..."
-                    horizon_data_valid = False
-    
-    if horizon_data_valid:
-        return hm, message
-    else:
-        return None, message  
-
-class OpenMeteoSolarForecastDataUpdateCoordinator(DataUpdateCoordinator[Estimate]):
+def _create_forecast(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]],
+    metrics: Metrics | None = None,
+) -> SharedOpenMeteoSolarForecast:
+    """Create the forecast client for the configuration of an entry."""
+    # Our option flow may cause it to be an empty string,
+    # this if statement is here to catch that.
+    api_key = entry.options.get(CONF_API_KEY) or None
+
+    # Handle new options that were added after the initial release
+    ac_kwp = entry.options.get(CONF_INVERTER_POWER, 0)
+    ac_kwp = ac_kwp / 1000 if ac_kwp else None
+
+    array_count = _resolve_array_count(
+        _entry_value(entry, CONF_LATITUDE),
+        _entry_value(entry, CONF_LONGITUDE),
+        entry.options[CONF_DECLINATION],
+        entry.options[CONF_AZIMUTH],
+        entry.options[CONF_MODULES_POWER],
+        entry.options.get(CONF_ARRAY_INVERTER_POWER, 0),
+        entry.options.get(CONF_EFFICIENCY_FACTOR, 1.0),
+        entry.options.get(CONF_TRACKING, "none"),
+        entry.options.get(CONF_USE_HORIZON, False),
+        entry.options.get(CONF_PARTIAL_SHADING, False),
+    )
+
+    latitude = _normalize_array_value(
+        _entry_value(entry, CONF_LATITUDE), array_count
+    )
+    longitude = _normalize_array_value(
+        _entry_value(entry, CONF_LONGITUDE), array_count
+    )
+    azimuth = _normalize_array_value(
+        entry.options[CONF_AZIMUTH],
+        array_count,
+        transform=lambda value: value - 180,
+    )
+    dc_kwp = _normalize_array_value(
+        entry.options[CONF_MODULES_POWER],
+        array_count,
+        transform=lambda value: value / 1000,
+    )
+    declination = _normalize_array_value(
+        entry.options[CONF_DECLINATION],
+        array_count,
+    )
+    efficiency_factor = _normalize_array_value(
+        entry.options.get(CONF_EFFICIENCY_FACTOR, 1.0),
+        array_count,
+    )
+    tracking = _normalize_array_value(
+        entry.options.get(CONF_TRACKING, "none"),
+        array_count,
+    )
+    use_horizon = _normalize_array_value(
+        entry.options.get(CONF_USE_HORIZON, False),
+        array_count,
+    )
+    partial_shading = _normalize_array_value(
+        entry.options.get(CONF_PARTIAL_SHADING, False),
+        array_count,
+    )
+
+    # Per-array inverter capacities (0 = no dedicated inverter for that
+    # array). If any array has its own inverter, pass a list to the
+    # library so each array's output is clamped individually; this
+    # overrides the shared inverter capacity configured above.
+    array_ac_kwp = _normalize_array_value(
+        entry.options.get(CONF_ARRAY_INVERTER_POWER, 0),
+        array_count,
+        transform=lambda value: value / 1000 if value else None,
+    )
+    if _is_sequence(array_ac_kwp):
+        if any(value is not None for value in array_ac_kwp):
+            ac_kwp = list(array_ac_kwp)
+    elif array_ac_kwp is not None:
+        # Single array with its own inverter: behaves like a shared one.
+        ac_kwp = array_ac_kwp
+
+    return SharedOpenMeteoSolarForecast(
+        request_registry=async_get_request_registry(hass),
+        metrics=metrics,
+        api_key=api_key,
+        session=async_get_clientsession(hass),
+        latitude=latitude,
+        longitude=longitude,
+        azimuth=azimuth,
+        base_url=entry.options[CONF_BASE_URL],
+        ac_kwp=ac_kwp,
+        dc_kwp=dc_kwp,
+        declination=declination,
+        efficiency_factor=efficiency_factor,
+        tracking=tracking,
+        damping_morning=entry.options.get(CONF_DAMPING_MORNING, 0.0),
+        damping_evening=entry.options.get(CONF_DAMPING_EVENING, 0.0),
+        use_horizon=use_horizon,
+        partial_shading=partial_shading,
+        horizon_map=horizon_map,
+        max_snowcover_depth_cm=entry.options.get(CONF_MAX_SNOWCOVER_DEPTH_CM, 0.0),
+        weather_model=entry.options.get(CONF_MODEL, "best_match"),
+    )
+
+
+class OpenMeteoSolarForecastDataUpdateCoordinator(
+    DataUpdateCoordinator[IndexedEstimate]
+):
     """The Solar Forecast Data Update Coordinator."""
 
     config_entry: ConfigEntry
@@ -191,116 +425,161 @@ class OpenMeteoSolarForecastDataUpdateCoordinator(DataUpdateCoordinator[Estimate
         hass: HomeAssistant,
         entry: ConfigEntry,
         horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]],
+        horizon_maps_by_path: dict[str, tuple[tuple[float, float], ...]] | None = None,
     ) -> None:
         """Initialize the Solar Forecast coordinator."""
         self.config_entry = entry
-
-        # Our option flow may cause it to be an empty string,
-        # this if statement is here to catch that.
-        api_key = entry.options.get(CONF_API_KEY) or None
-
-        # Handle new options that were added after the initial release
-        ac_kwp = entry.options.get(CONF_INVERTER_POWER, 0)
-        ac_kwp = ac_kwp / 1000 if ac_kwp else None
+        # Maps of the horizon files in use, to tell when one of them changed.
+        self.horizon_maps_by_path = horizon_maps_by_path or {}
+        # Stops polling the horizon files, while there are any to poll.
+        self.unsub_horizon_watch: CALLBACK_TYPE | None = None
         self._last_successful_update: datetime | None = None
         self._store: Store[dict[str, Any]] = RetainedForecastStore(
             hass, STORAGE_VERSION, storage_key(entry.entry_id)
         )
-        self._config_fingerprint = _config_fingerprint(entry)
-
-        array_count = _resolve_array_count(
-            _entry_value(entry, CONF_LATITUDE),
-            _entry_value(entry, CONF_LONGITUDE),
-            entry.options[CONF_DECLINATION],
-            entry.options[CONF_AZIMUTH],
-            entry.options[CONF_MODULES_POWER],
-            entry.options.get(CONF_ARRAY_INVERTER_POWER, 0),
-            entry.options.get(CONF_EFFICIENCY_FACTOR, 1.0),
-            entry.options.get(CONF_TRACKING, "none"),
-            entry.options.get(CONF_USE_HORIZON, False),
-            entry.options.get(CONF_PARTIAL_SHADING, False),
+        # When the forecast was last confirmed, kept apart from the forecast
+        # itself so it can be updated without rewriting it.
+        self._meta_store: Store[dict[str, Any]] = Store(
+            hass, META_STORAGE_VERSION, meta_storage_key(entry.entry_id)
         )
-
-        latitude = _normalize_array_value(
-            _entry_value(entry, CONF_LATITUDE), array_count
+        self._stored_digest: str | None = None
+        self._stored_update: datetime | None = None
+        self._run_seen_at: datetime | None = None
+        self._run_signatures: list[Any] | None = None
+        # Whether the forecast served is for options no longer in effect,
+        # until weather data for the current ones is fetched.
+        self._options_pending = False
+        self._responses: list[Any] | None = None
+        self._volatility: float | None = None
+        self.metrics = Metrics()
+        self._apply_entry(hass, entry, horizon_map)
+        self.ticks = TickScheduler(hass, self._forecast_timezone)
+
+        super().__init__(
+            hass, LOGGER, name=DOMAIN, update_interval=DEFAULT_UPDATE_INTERVAL
         )
-        longitude = _normalize_array_value(
-            _entry_value(entry, CONF_LONGITUDE), array_count
-        )
-        azimuth = _normalize_array_value(
-            entry.options[CONF_AZIMUTH],
-            array_count,
-            transform=lambda value: value - 180,
-        )
-        dc_kwp = _normalize_array_value(
-            entry.options[CONF_MODULES_POWER],
-            array_count,
-            transform=lambda value: value / 1000,
+
+    def _apply_entry(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]],
+    ) -> None:
+        """Set up the forecast client and refresh schedule from the entry."""
+        self.forecast = _create_forecast(hass, entry, horizon_map, self.metrics)
+        # Weather data of requests the entry no longer makes is not kept.
+        async_get_request_registry(hass).async_set_keys(
+            entry.entry_id, self.forecast.request_keys()
         )
-        declination = _normalize_array_value(
-            entry.options[CONF_DECLINATION],
-            array_count,
+        # Arrays and entries with the same horizon file share the lookup table.
+        self.horizon_profiles = async_get_horizon_cache(hass).profiles(
+            self.forecast.horizon_map
         )
-        efficiency_factor = _normalize_array_value(
-            entry.options.get(CONF_EFFICIENCY_FACTOR, 1.0),
-            array_count,
+        self._entry_snapshot = (dict(entry.data), dict(entry.options))
+        self._config_fingerprint = _config_fingerprint(entry)
+        self.horizons = LookaheadHorizons.from_options(entry.options)
+        self.attribute_mode: str = entry.options.get(
+            CONF_ATTRIBUTE_MODE, ATTRIBUTE_MODE_FULL
         )
-        tracking = _normalize_array_value(
-            entry.options.get(CONF_TRACKING, "none"),
-            array_count,
+        self.attribute_max_points: int = entry.options.get(
+            CONF_ATTRIBUTE_MAX_POINTS, DEFAULT_ATTRIBUTE_MAX_POINTS
         )
-        use_horizon = _normalize_array_value(
-            entry.options.get(CONF_USE_HORIZON, False),
-            array_count,
+        self.import_statistics: bool = entry.options.get(
+            CONF_IMPORT_STATISTICS, False
         )
-        partial_shading = _normalize_array_value(
-            entry.options.get(CONF_PARTIAL_SHADING, False),
-            array_count,
+        self.energy_resolution: str = entry.options.get(
+            CONF_ENERGY_RESOLUTION, ENERGY_RESOLUTION_HOUR
         )
+        self._schedule = ModelRunSchedule(entry.options.get(CONF_MODEL, "best_match"))
+        self._adaptive_refresh: AdaptiveRefresh | None = None
+        if entry.options.get(CONF_ADAPTIVE_REFRESH, False):
+            self._adaptive_refresh = AdaptiveRefresh(
+                self.forecast.latitude[0], self.forecast.longitude[0]
+            )
 
-        # Per-array inverter capacities (0 = no dedicated inverter for that
-        # array). If any array has its own inverter, pass a list to the
-        # library so each array's output is clamped individually; this
-        # overrides the shared inverter capacity configured above.
-        array_ac_kwp = _normalize_array_value(
-            entry.options.get(CONF_ARRAY_INVERTER_POWER, 0),
-            array_count,
-            transform=lambda value: value / 1000 if value else None,
-        )
-        if _is_sequence(array_ac_kwp):
-            if any(value is not None for value in array_ac_kwp):
-                ac_kwp = list(array_ac_kwp)
-        elif array_ac_kwp is not None:
-            # Single array with its own inverter: behaves like a shared one.
-            ac_kwp = array_ac_kwp
-
-        self.forecast = OpenMeteoSolarForecast(
-            api_key=api_key,
-            session=async_get_clientsession(hass),
-            latitude=latitude,
-            longitude=longitude,
-            azimuth=azimuth,
-            base_url=entry.options[CONF_BASE_URL],
-            ac_kwp=ac_kwp,
-            dc_kwp=dc_kwp,
-            declination=declination,
-            efficiency_factor=efficiency_factor,
-            tracking=tracking,
-            damping_morning=entry.options.get(CONF_DAMPING_MORNING, 0.0),
-            damping_evening=entry.options.get(CONF_DAMPING_EVENING, 0.0),
-            use_horizon=use_horizon,
-            partial_shading=partial_shading,
-            horizon_map=horizon_map,
-            max_snowcover_depth_cm=entry.options.get(CONF_MAX_SNOWCOVER_DEPTH_CM, 0.0),
-            weather_model=entry.options.get(CONF_MODEL, "best_match"),
-        )
+    def _forecast_timezone(self) -> tzinfo:
+        """Return the timezone the forecast's days and hours are in."""
+        if self.data is None:
+            return timezone.utc
+        return self.data.api_timezone
+
+    async def async_shutdown(self) -> None:
+        """Cancel any scheduled refresh and sensor updates."""
+        await super().async_shutdown()
+        self.ticks.async_shutdown()
 
-        update_interval = timedelta(minutes=30)
+    @property
+    def array_count(self) -> int:
+        """Return the number of arrays of the forecast."""
+        return len(self.forecast.dc_kwp)
 
-        super().__init__(hass, LOGGER, name=DOMAIN, update_interval=update_interval)
+    def entry_changed(self) -> bool:
+        """Return whether the entry data or options changed since applied."""
+        entry = self.config_entry
+        return self._entry_snapshot != (dict(entry.data), dict(entry.options))
 
-    async def _async_load_retained_estimate(self) -> Estimate | None:
+    async def async_apply_options(
+        self,
+        horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]],
+    ) -> None:
+        """Apply changed options without reloading the config entry.
+
+        The forecast is recomputed from the weather data already fetched,
+        unless the change affects the weather request itself (location,
+        orientation, model, API settings), which needs a refresh. Until that
+        refresh succeeds, the forecast of the previous options is not served.
+        """
+        request_keys = self.forecast.request_keys()
+        self._apply_entry(self.hass, self.config_entry, horizon_map)
+
+        if self._responses is not None and self.forecast.request_keys() == request_keys:
+            LOGGER.debug("Recomputing forecast for changed options")
+            estimate = await self._async_compute_estimate(self._responses)
+        else:
+            estimate = await self._async_estimate_from_cache()
+
+        if estimate is None:
+            # The current run has to be fetched for the new options; the
+            # weather data at hand is not for them.
+            self._run_seen_at = None
+            self._responses = None
+            self._options_pending = True
+            await self.async_refresh()
+            return
+
+        await self._async_save_retained_estimate(estimate)
+        self._schedule_next_update()
+        self.async_set_updated_data(estimate)
+
+    async def async_apply_horizon(
+        self,
+        horizon_map: tuple[tuple[float, float], ...] | list[tuple[tuple[float, float], ...]],
+    ) -> None:
+        """Apply changed horizon files without fetching weather data.
+
+        The forecast is recomputed from the weather data already fetched; if
+        there is none, the new horizon is used from the next refresh on.
+        """
+        self._apply_entry(self.hass, self.config_entry, horizon_map)
+
+        if self._responses is not None:
+            LOGGER.debug("Recomputing forecast for changed horizon files")
+            estimate = await self._async_compute_estimate(self._responses)
+        elif (estimate := await self._async_estimate_from_cache()) is None:
+            # Let the next refresh fetch the current run again.
+            self._run_seen_at = None
+            return
+
+        await self._async_save_retained_estimate(estimate)
+        self._schedule_next_update()
+        self.async_set_updated_data(estimate)
+
+    async def _async_load_retained_estimate(self) -> IndexedEstimate | None:
         """Load the retained forecast persisted across restarts."""
+        with self.metrics.timed(self.metrics.store_load_time):
+            return await self._async_load_retained()
+
+    async def _async_load_retained(self) -> IndexedEstimate | None:
         stored = await self._store.async_load()
         if not stored:
             return None
@@ -312,61 +591,187 @@ class OpenMeteoSolarForecastDataUpdateCoordinator(DataUpdateCoordinator[Estimate
             return None
 
         try:
-            last_update = stored["last_successful_update"]
-            estimate = Estimate(
-                watts=_datetime_dict_from_json(stored["watts"]),
-                wh_period_15m=_datetime_dict_from_json(stored["wh_period_15m"]),
-                wh_period=_datetime_dict_from_json(stored["wh_period"]),
-                wh_days=_date_dict_from_json(stored["wh_days"]),
-                api_timezone=timezone(
-                    timedelta(seconds=stored["api_timezone_offset"])
-                ),
+            digest = stored["digest"]
+            estimate = await self.hass.async_add_executor_job(
+                unpack_estimate, stored["estimate"]
             )
         except (KeyError, TypeError, ValueError):
             LOGGER.warning("Discarding malformed retained forecast data")
             return None
 
-        self._last_successful_update = dt_util.parse_datetime(last_update)
+        # Without a matching freshness record (e.g. a write was interrupted)
+        # the forecast is still served, but treated as outdated.
+        last_update = None
+        meta = await self._meta_store.async_load()
+        if meta and meta.get("digest") == digest:
+            last_update = dt_util.parse_datetime(meta.get("last_successful_update", ""))
+
+        self._stored_digest = digest
+        self._stored_update = last_update
+        self._last_successful_update = last_update
         return estimate
 
-    def _save_retained_estimate(self, estimate: Estimate) -> None:
-        """Persist the forecast so retention survives restarts and reloads."""
-        data = {
-            "config_fingerprint": self._config_fingerprint,
+    async def _async_save_retained_estimate(self, estimate: IndexedEstimate) -> None:
+        """Persist the forecast so retention survives restarts and reloads.
+
+        The forecast is only written if its content changed; otherwise only
+        its freshness record is updated, if that is needed at all.
+        """
+        with self.metrics.timed(self.metrics.store_save_time):
+            payload = {
+                "config_fingerprint": self._config_fingerprint,
+                "estimate": await self.hass.async_add_executor_job(
+                    pack_estimate, estimate
+                ),
+            }
+            digest = await self.hass.async_add_executor_job(payload_digest, payload)
+        if digest != self._stored_digest:
+            payload["digest"] = digest
+            self._store.async_delay_save(lambda: payload, 60)
+            self._stored_digest = digest
+            self._stored_update = None
+
+        self._save_retained_freshness()
+
+    def _save_retained_freshness(self) -> None:
+        """Record when the retained forecast was last confirmed.
+
+        This only needs updating once the recorded time no longer covers the
+        newest model run, since that is what decides whether the retained
+        forecast is reused after a restart.
+        """
+        if self._stored_digest is None or self._last_successful_update is None:
+            return
+        if self._stored_update is not None and self._schedule.is_current(
+            self._stored_update, self._last_successful_update
+        ):
+            return
+
+        meta = {
+            "digest": self._stored_digest,
             "last_successful_update": self._last_successful_update.isoformat(),
-            "watts": _datetime_dict_to_json(estimate.watts),
-            "wh_period": _datetime_dict_to_json(estimate.wh_period),
-            "wh_days": _datetime_dict_to_json(estimate.wh_days),
-            "wh_period_15m": _datetime_dict_to_json(estimate.wh_period_15m),
-            "api_timezone_offset": estimate.api_timezone.utcoffset(
-                None
-            ).total_seconds(),
         }
-        self._store.async_delay_save(lambda: data, 60)
+        self._meta_store.async_delay_save(lambda: meta, 60)
+        self._stored_update = self._last_successful_update
+
+    async def _async_compute_estimate(self, responses: list[Any]) -> IndexedEstimate:
+        """Compute the estimate from weather data off the event loop."""
+        return await self.hass.async_add_executor_job(
+            self._compute_estimate, self.forecast, responses, self.horizon_profiles
+        )
+
+    def _compute_estimate(
+        self,
+        forecast: OpenMeteoSolarForecast,
+        responses: list[Any],
+        profiles: list[HorizonProfile],
+    ) -> IndexedEstimate:
+        with self.metrics.timed(self.metrics.compute_time):
+            return _compute_indexed_estimate(forecast, responses, profiles)
+
+    async def _async_estimate_from_cache(self) -> IndexedEstimate | None:
+        """Recompute the forecast from cached weather data, without fetching.
+
+        Only weather data of the newest model run is used. Changes to PV
+        settings that are not part of the weather request (panel power,
+        damping, inverters, horizon, ...) are then applied locally.
+        """
+        if (cached := self.forecast.cached_responses()) is None:
+            return None
+
+        fetched_at, responses = cached
+        if not self._schedule.is_current(fetched_at, dt_util.utcnow()):
+            return None
+
+        LOGGER.debug("Recomputing forecast from weather data fetched at %s", fetched_at)
+        estimate = await self._async_compute_estimate(responses)
+        self._last_successful_update = fetched_at
+        self._run_signatures = [_run_signature(response) for response in responses]
+        self._responses = responses
+        self._run_seen_at = fetched_at
+        self._options_pending = False
+        await self._async_save_retained_estimate(estimate)
+        return estimate
 
-    async def _async_update_data(self) -> Estimate:
+    def _schedule_next_update(self) -> None:
+        """Time the next refresh to the publication of the next model run.
+
+        With adaptive refresh, night-time refreshes are skipped and daylight
+        refreshes come sooner while the forecast is volatile.
+        """
+        now = dt_util.utcnow()
+        next_refresh = self._schedule.next_refresh(now, self._run_seen_at)
+        if self._adaptive_refresh is not None:
+            # The forecast only changes with a new run, so a volatile one
+            # only hurries polling for a run that is late, never the next.
+            run_is_late = self._run_seen_at is None or not self._schedule.is_current(
+                self._run_seen_at, now
+            )
+            next_refresh = self._adaptive_refresh.next_refresh(
+                now, next_refresh, self._volatility if run_is_late else None
+            )
+        self.update_interval = max(next_refresh - now, MIN_UPDATE_INTERVAL)
+
+    async def _async_update_data(self) -> IndexedEstimate:
         """Fetch Open-Meteo Solar Forecast estimates."""
+        try:
+            return await self._async_fetch_estimate()
+        finally:
+            self._schedule_next_update()
+
+    async def _async_fetch_estimate(self) -> IndexedEstimate:
+        """Fetch the forecast, reusing the current one if the run is unchanged."""
         # On the first refresh after a restart or reload, reuse the stored
-        # forecast if it is younger than the update interval instead of
-        # hitting the API again.
+        # forecast if no newer model run has been published since it was
+        # fetched instead of hitting the API again.
         if self.data is None:
             retained = await self._async_load_retained_estimate()
             if (
                 retained is not None
                 and self._last_successful_update is not None
-                and dt_util.utcnow() - self._last_successful_update
-                < self.update_interval
+                and self._schedule.is_current(
+                    self._last_successful_update, dt_util.utcnow()
+                )
             ):
                 LOGGER.debug(
                     "Using stored forecast from %s, skipping fetch",
                     self._last_successful_update,
                 )
+                self._run_seen_at = self._last_successful_update
                 return retained
 
+            # After an options change the retained forecast no longer matches
+            # the configuration, but the weather behind it usually does.
+            if (estimate := await self._async_estimate_from_cache()) is not None:
+                return estimate
+
+        elif self._run_seen_at is not None and self._schedule.is_current(
+            self._run_seen_at, dt_util.utcnow()
+        ):
+            # The newest run is already served, so the API would return it
+            # again; only a late run is polled for before the next one is due.
+            LOGGER.debug(
+                "Model run seen at %s is still the newest, skipping fetch",
+                self._run_seen_at,
+            )
+            return self.data
+
         try:
             async with asyncio.timeout(API_TIMEOUT_SECONDS):
-                estimate = await self.forecast.estimate()
+                responses = await self.forecast.async_fetch()
+                run_signatures = [_run_signature(response) for response in responses]
+                if self.data is not None and run_signatures == self._run_signatures:
+                    estimate = None
+                else:
+                    estimate = await self._async_compute_estimate(responses)
         except Exception as err:
+            if self._options_pending:
+                # Serving the previous forecast would hide that the changed
+                # options are not in effect.
+                raise UpdateFailed(
+                    f"Error fetching the forecast for the changed options: {err}"
+                ) from err
+
             retained = self.data
             if retained is None:
                 retained = await self._async_load_retained_estimate()
@@ -380,7 +785,22 @@ class OpenMeteoSolarForecastDataUpdateCoordinator(DataUpdateCoordinator[Estimate
             return retained
 
         self._last_successful_update = dt_util.utcnow()
-        self._save_retained_estimate(estimate)
+        self._options_pending = False
+        if estimate is None:
+            # Same model run as last time: nothing to parse or save.
+            LOGGER.debug(
+                "Model run unchanged since %s, keeping current forecast",
+                self._run_seen_at,
+            )
+            self._save_retained_freshness()
+            return self.data
+
+        if self._adaptive_refresh is not None and self.data is not None:
+            self._volatility = forecast_volatility(
+                self.data.watts, estimate.watts, estimate.now()
+            )
+        self._run_signatures = run_signatures
+        self._responses = responses
+        self._run_seen_at = self._last_successful_update
+        await self._async_save_retained_estimate(estimate)
         return estimate
-    
-    
@@ -4,15 +4,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from open_meteo_solar_forecast import Estimate
-
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
+from .coordinator import OpenMeteoSolarForecastDataUpdateCoordinator
 
 TO_REDACT = {
     CONF_API_KEY,
@@ -25,7 +23,9 @@ async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
-    coordinator: DataUpdateCoordinator[Estimate] = hass.data[DOMAIN][entry.entry_id]
+    coordinator: OpenMeteoSolarForecastDataUpdateCoordinator = hass.data[DOMAIN][
+        entry.entry_id
+    ]
 
     return {
         "entry": {
@@ -55,4 +55,5 @@ async def async_get_config_entry_diagnostics(
         "account": {
             "timezone": coordinator.data.timezone,
         },
+        "metrics": coordinator.metrics.as_dict(),
     }
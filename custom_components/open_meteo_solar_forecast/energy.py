@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import ATTR_WH_PERIOD, ATTR_WH_PERIOD_15M, DOMAIN, ENERGY_RESOLUTION_15M
 
 
 async def async_get_solar_forecast(
@@ -14,9 +14,6 @@ async def async_get_solar_forecast(
     if (coordinator := hass.data[DOMAIN].get(config_entry_id)) is None:
         return None
 
-    return {
-        "wh_hours": {
-            timestamp.isoformat(): val
-            for timestamp, val in coordinator.data.wh_period.items()
-        }
-    }
+    if coordinator.energy_resolution == ENERGY_RESOLUTION_15M:
+        return coordinator.data.energy_forecast(ATTR_WH_PERIOD_15M)
+    return coordinator.data.energy_forecast(ATTR_WH_PERIOD)
@@ -0,0 +1,420 @@
+"""Vectorized PV power computation for the Open-Meteo Solar Forecast integration.
+
+The forecast library turns the weather data of every array into power one
+timestep at a time. This module does the same computation (horizon shading,
+damping, snow cover, cell temperature and inverter clipping) as NumPy
+operations over an (arrays x timesteps) matrix and produces the same
+Estimate, which matters for installations with many arrays.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy
+import suncalc
+from open_meteo_solar_forecast import Estimate, OpenMeteoSolarForecast
+from open_meteo_solar_forecast.constants import (
+    ALPHA_TEMP,
+    G_STC,
+    TEMP_STC_CELL,
+    RossModelConstants,
+)
+from open_meteo_solar_forecast.exceptions import OpenMeteoSolarForecastConfigError
+
+from .horizon import HorizonProfile, horizon_profiles
+from .models import ArrayEstimate
+
+# The irradiance of a 15-minute value refers to the interval ending at its
+# timestamp, so power is keyed by the start of that interval.
+STEP_SECONDS = 900
+
+_MICROSECONDS = 1_000_000
+
+
+def _column(response: Mapping[str, Any], key: str) -> numpy.ndarray:
+    """Return a minutely_15 series as floats, with missing values as NaN."""
+    return numpy.array(response["minutely_15"][key], dtype=float)
+
+
+def _damping_factors(
+    response: Mapping[str, Any],
+    times: numpy.ndarray,
+    utc_offset: int,
+    damping_morning: float,
+    damping_evening: float,
+) -> numpy.ndarray:
+    """Return the morning/evening damping coefficient of every timestep.
+
+    Sunrise and sunset are looked up by the local date of each timestep and
+    re-anchored onto the date of their daily entry, like the library does.
+    """
+    day_seconds = 86400
+    daily_times = numpy.array(response["daily"]["time"], dtype=numpy.int64)
+    daily_days = (daily_times + utc_offset) // day_seconds
+
+    def anchor(timestamps: list[int]) -> numpy.ndarray:
+        local = numpy.array(timestamps, dtype=numpy.int64) + utc_offset
+        anchored = daily_days * day_seconds + local % day_seconds - utc_offset
+        return anchored * _MICROSECONDS
+
+    sunrise_by_day = anchor(response["daily"]["sunrise"])
+    sunset_by_day = anchor(response["daily"]["sunset"])
+
+    time_days = (times + utc_offset) // day_seconds
+    index = numpy.clip(
+        numpy.searchsorted(daily_days, time_days), 0, len(daily_days) - 1
+    )
+    known_day = daily_days[index] == time_days
+
+    time_us = times * _MICROSECONDS
+    sunrise = sunrise_by_day[index]
+    sunset = sunset_by_day[index]
+    midday = sunrise + (sunset - sunrise) // 2
+
+    def linear_damping(
+        start: numpy.ndarray, end: numpy.ndarray, damping: float
+    ) -> numpy.ndarray:
+        duration = end - start
+        elapsed = time_us - start
+        ratio = numpy.divide(
+            elapsed,
+            duration,
+            out=numpy.zeros(len(times)),
+            where=duration != 0,
+        )
+        damping = 1.0 - damping  # Invert the damping factor
+        return ratio * (1.0 - damping) + damping
+
+    morning = known_day & (sunrise <= time_us) & (time_us <= midday)
+    evening = known_day & ~morning & (midday <= time_us) & (time_us <= sunset)
+    return numpy.where(
+        morning,
+        linear_damping(sunrise, midday, damping_morning),
+        numpy.where(evening, linear_damping(sunset, midday, damping_evening), 1.0),
+    )
+
+
+def _horizon_shading(
+    times: numpy.ndarray,
+    longitude: float,
+    latitude: float,
+    profile: HorizonProfile,
+) -> numpy.ndarray:
+    """Return whether the horizon blocks direct sunlight at every timestep."""
+    # Nanosecond resolution converts to the same milliseconds with and
+    # without pandas installed.
+    position = suncalc.get_position(
+        times.astype("datetime64[s]").astype("datetime64[ns]"), longitude, latitude
+    )
+    azimuth = (180 + numpy.rad2deg(position["azimuth"])) % 360
+    altitude = numpy.rad2deg(position["altitude"])
+    return altitude < profile.elevation(azimuth)
+
+
+def _gen_power(
+    dc_wp: numpy.ndarray,
+    gti: numpy.ndarray,
+    t_amb: numpy.ndarray,
+    eff: numpy.ndarray,
+) -> numpy.ndarray:
+    """Calculate the power generated by the arrays, like the library does."""
+    temp_cell = t_amb + gti * RossModelConstants.NOT_SO_WELL_COOLED
+    power = dc_wp * (gti / G_STC)
+    power = power * (1 + ALPHA_TEMP * (temp_cell - TEMP_STC_CELL))
+    power = power * eff
+    return numpy.rint(numpy.where(power > 0, power, 0.0))
+
+
+def compute_power(
+    forecast: OpenMeteoSolarForecast,
+    responses: Sequence[Mapping[str, Any]],
+    profiles: Sequence[HorizonProfile] | None = None,
+) -> tuple[timezone, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Compute the power of every array from its weather response.
+
+    profiles are the horizon profiles of the arrays; they are built from the
+    horizon maps of the forecast when not given.
+
+    Returns the API timezone, the interval start timestamps, the average and
+    instantaneous power per array (arrays x timesteps, clipped to per-array
+    inverters) and a mask of the timesteps for which each array had data.
+    """
+    array_count = len(forecast.dc_kwp)
+    if len(responses) != array_count:
+        raise OpenMeteoSolarForecastConfigError(
+            "Expected weather data for every array"
+        )
+
+    utc_offset = responses[0]["utc_offset_seconds"]
+    if any(response["utc_offset_seconds"] != utc_offset for response in responses):
+        raise OpenMeteoSolarForecastConfigError(
+            "The UTC offset is not the same for all locations"
+        )
+
+    array_times = [
+        numpy.array(response["minutely_15"]["time"], dtype=numpy.int64)
+        for response in responses
+    ]
+    if all(numpy.array_equal(array_times[0], times) for times in array_times[1:]):
+        axis = array_times[0]
+        positions: list[Any] = [slice(None)] * array_count
+    else:
+        axis = numpy.unique(numpy.concatenate(array_times))
+        positions = [numpy.searchsorted(axis, times) for times in array_times]
+
+    shape = (array_count, len(axis))
+    valid = numpy.zeros(shape, dtype=bool)
+    g_avg, g_inst, d_avg, d_inst, dr_avg, dr_inst = (
+        numpy.zeros(shape) for _ in range(6)
+    )
+    snow, temp_avg, temp_inst, damping = (numpy.zeros(shape) for _ in range(4))
+    shaded = numpy.zeros(shape, dtype=bool)
+    if profiles is None and any(forecast.use_horizon):
+        profiles = horizon_profiles(forecast.horizon_map)
+
+    for row, (response, times, position) in enumerate(
+        zip(responses, array_times, positions, strict=True)
+    ):
+        temp = _column(response, "temperature_2m")
+        gti_avg = _column(response, "global_tilted_irradiance")
+        gti_inst = _column(response, "global_tilted_irradiance_instant")
+
+        # A value needs the previous temperature as well, so the first
+        # timestep never has one; timesteps with missing data are skipped.
+        row_valid = ~(
+            numpy.isnan(gti_avg)
+            | numpy.isnan(gti_inst)
+            | numpy.isnan(temp)
+            | numpy.isnan(numpy.roll(temp, 1))
+        )
+        row_valid[:1] = False
+
+        valid[row, position] = row_valid
+        g_avg[row, position] = gti_avg
+        g_inst[row, position] = gti_inst
+        d_avg[row, position] = _column(response, "diffuse_radiation")
+        d_inst[row, position] = _column(response, "diffuse_radiation_instant")
+        dr_avg[row, position] = _column(response, "direct_radiation")
+        dr_inst[row, position] = _column(response, "direct_radiation_instant")
+        snow[row, position] = _column(response, "snow_depth")
+        temp_avg[row, position] = (temp + numpy.roll(temp, 1)) / 2
+        temp_inst[row, position] = numpy.roll(temp, 1)
+        damping[row, position] = _damping_factors(
+            response,
+            times,
+            utc_offset,
+            forecast.damping_morning[row],
+            forecast.damping_evening[row],
+        )
+        if forecast.use_horizon[row]:
+            shaded[row, position] = _horizon_shading(
+                times,
+                forecast.longitude[row],
+                forecast.latitude[row],
+                profiles[row],
+            )
+
+    # Only the validated irradiance and temperature series may be missing
+    # without the timestep being skipped; treat other gaps as zero.
+    for matrix in (d_avg, d_inst, dr_avg, dr_inst, snow):
+        numpy.nan_to_num(matrix, copy=False)
+
+    def column(values: Sequence[Any]) -> numpy.ndarray:
+        return numpy.array(values, dtype=float)[:, numpy.newaxis]
+
+    use_partial_shading = column(
+        [
+            bool(use_horizon and partial_shading)
+            for use_horizon, partial_shading in zip(
+                forecast.use_horizon, forecast.partial_shading, strict=True
+            )
+        ]
+    ).astype(bool)
+    max_snowcover = column(forecast.max_snowcover_depth_cm)
+    dc_wp = column(forecast.dc_kwp) * 1000
+    efficiency = column(forecast.efficiency_factor)
+    ac_wp_array = (
+        numpy.full((array_count, 1), float("inf"))
+        if forecast.shared_inverter
+        else column(forecast.ac_kwp) * 1000
+    )
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+
+        def diffuse_fraction(
+            diffuse: numpy.ndarray, direct: numpy.ndarray
+        ) -> numpy.ndarray:
+            total = diffuse + direct
+            fraction = numpy.maximum(diffuse / total, 0.0)
+            return numpy.where(use_partial_shading & (total > 0), fraction, 1.0)
+
+        snowcover_factor = numpy.where(
+            max_snowcover > 0,
+            1.0 - numpy.minimum((snow * 100) / max_snowcover, 1.0),
+            1.0,
+        )
+
+        irr_avg = numpy.where(shaded, d_avg * diffuse_fraction(d_avg, dr_avg), g_avg)
+        irr_inst = numpy.where(
+            shaded, d_inst * diffuse_fraction(d_inst, dr_inst), g_inst
+        )
+        irr_avg = numpy.where(max_snowcover > 0, irr_avg * snowcover_factor, irr_avg)
+        irr_inst = numpy.where(
+            max_snowcover > 0, irr_inst * snowcover_factor, irr_inst
+        )
+
+        eff_damped = efficiency * damping
+        w_avg = numpy.rint(
+            numpy.minimum(
+                _gen_power(dc_wp, irr_avg, temp_avg, eff_damped), ac_wp_array
+            )
+        )
+        w_inst = numpy.rint(
+            numpy.minimum(
+                _gen_power(dc_wp, irr_inst, temp_inst, eff_damped), ac_wp_array
+            )
+        )
+
+    w_avg[~valid] = 0
+    w_inst[~valid] = 0
+    return (
+        timezone(timedelta(seconds=utc_offset)),
+        axis - STEP_SECONDS,
+        w_avg,
+        w_inst,
+        valid,
+    )
+
+
+def build_estimate(
+    forecast: OpenMeteoSolarForecast,
+    tz: timezone,
+    starts: numpy.ndarray,
+    w_avg: numpy.ndarray,
+    w_inst: numpy.ndarray,
+    valid: numpy.ndarray,
+) -> Estimate:
+    """Combine per-array power into an Estimate, clipped to the inverter(s)."""
+    # With a shared inverter the combined output is clamped to its capacity;
+    # with per-array inverters each array was already clamped individually,
+    # so the combined output is limited by the sum of all capacities.
+    ac_kwp_total = (
+        forecast.ac_kwp[0] if forecast.shared_inverter else sum(forecast.ac_kwp)
+    )
+    ac_wp = ac_kwp_total * 1000
+
+    present = valid.any(axis=0)
+    timestamps = [
+        datetime.fromtimestamp(start, tz) for start in starts[present].tolist()
+    ]
+
+    def combined(power: numpy.ndarray) -> dict[datetime, int | float]:
+        return {
+            timestamp: ac_wp if ac_wp < value else value
+            for timestamp, value in zip(
+                timestamps,
+                power.sum(axis=0)[present].astype(numpy.int64).tolist(),
+                strict=True,
+            )
+        }
+
+    watts = combined(w_inst)
+    average = combined(w_avg)
+
+    # Energy for each half-open interval [time, time + 15 minutes).
+    wh_period_15m = {timestamp: power * 0.25 for timestamp, power in average.items()}
+
+    # Average power per hour is the energy of that hour
+    wh_period: dict[datetime, Any] = {}
+    wh_period_count: dict[datetime, int] = {}
+    for timestamp, power in average.items():
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        wh_period[hour] = wh_period.get(hour, 0) + power
+        wh_period_count[hour] = wh_period_count.get(hour, 0) + 1
+    for hour in wh_period:
+        wh_period[hour] /= wh_period_count[hour]
+
+    wh_days: dict[Any, Any] = {}
+    for hour, energy in wh_period.items():
+        day = hour.date()
+        wh_days[day] = wh_days.get(day, 0) + energy
+
+    return Estimate(
+        watts=watts,
+        wh_period=wh_period,
+        wh_days=wh_days,
+        api_timezone=tz,
+        wh_period_15m=wh_period_15m,
+    )
+
+
+def build_array_estimates(
+    forecast: OpenMeteoSolarForecast,
+    tz: timezone,
+    starts: numpy.ndarray,
+    w_avg: numpy.ndarray,
+    w_inst: numpy.ndarray,
+    valid: numpy.ndarray,
+) -> list[ArrayEstimate]:
+    """Break the combined estimate down into the contribution of every array.
+
+    Where the combined output is clipped to the inverter capacity, each array
+    keeps its share of the clipped output. Energy is worked out like in
+    build_estimate(), so the arrays add up to the combined estimate except
+    for rounding. Single-array forecasts have no breakdown.
+    """
+    if len(w_avg) < 2:
+        return []
+
+    ac_kwp_total = (
+        forecast.ac_kwp[0] if forecast.shared_inverter else sum(forecast.ac_kwp)
+    )
+    ac_wp = ac_kwp_total * 1000
+
+    present = valid.any(axis=0)
+    starts = starts[present]
+    timestamps = [datetime.fromtimestamp(start, tz) for start in starts.tolist()]
+
+    def clipped(power: numpy.ndarray) -> numpy.ndarray:
+        power = power[:, present]
+        total = power.sum(axis=0)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            share = numpy.where(total > ac_wp, ac_wp / total, 1.0)
+        return power * share
+
+    watts = numpy.rint(clipped(w_inst)).astype(numpy.int64)
+
+    # Hourly energy is the average power of the hour, like in build_estimate.
+    utc_offset = int(tz.utcoffset(None).total_seconds())
+    hours, hour_index = numpy.unique((starts + utc_offset) // 3600, return_inverse=True)
+    hour_counts = numpy.bincount(hour_index)
+    days, day_index = numpy.unique(hours // 24, return_inverse=True)
+    day_dates = [
+        datetime.fromtimestamp(day * 86400, timezone.utc).date()
+        for day in days.tolist()
+    ]
+
+    arrays = []
+    for array_watts, array_average in zip(watts, clipped(w_avg), strict=True):
+        hourly = numpy.bincount(hour_index, array_average) / hour_counts
+        daily = numpy.bincount(day_index, hourly)
+        arrays.append(
+            ArrayEstimate(
+                watts=dict(zip(timestamps, array_watts.tolist(), strict=True)),
+                wh_period_15m=dict(
+                    zip(timestamps, (array_average * 0.25).tolist(), strict=True)
+                ),
+                wh_days=dict(zip(day_dates, daily.tolist(), strict=True)),
+            )
+        )
+    return arrays
+
+
+def compute_estimate(
+    forecast: OpenMeteoSolarForecast, responses: Sequence[Mapping[str, Any]]
+) -> Estimate:
+    """Compute the estimate of a forecast client from its weather responses."""
+    return build_estimate(forecast, *compute_power(forecast, responses))
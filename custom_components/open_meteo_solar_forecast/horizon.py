@@ -0,0 +1,255 @@
+"""Loading and validation of horizon files.
+
+A horizon file has one line per azimuth, with the azimuth and the altitude of
+the horizon in degrees separated by a tab, ascending from 0° to 360°. CSV and
+JSON profiles of other tools are imported by horizon_import.
+
+If a cache directory is given, parsed horizon maps are cached there as .npy
+files, keyed by the path, modification time and size of the horizon file.
+Loading a horizon file that did not change since then skips parsing and
+validation entirely. Loaded files are kept in memory by the HorizonCache of
+the integration.
+
+A HorizonProfile turns a horizon map into a lookup table of the horizon
+elevation, so the shading of a whole forecast is a single array lookup.
+
+This module only depends on NumPy, so the tester script can use it as well.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+import hashlib
+import os
+
+import numpy
+
+try:
+    from .horizon_import import (
+        DEFAULT_TOLERANCE,
+        import_horizon_profile,
+        is_import_file,
+    )
+except ImportError:
+    # Imported by the tester script, outside of the package.
+    from horizon_import import (  # type: ignore[no-redef]
+        DEFAULT_TOLERANCE,
+        import_horizon_profile,
+        is_import_file,
+    )
+
+HorizonMap = tuple[tuple[float, float], ...]
+
+# Bins per degree of azimuth of the elevation lookup tables.
+BINS_PER_DEGREE = 10
+
+_SHAPE_HINT = (
+    "It has to be at least two rows and exactly two columns (N>1 , 2). "
+    "Please check (two columns, tab delimiter, decimal points)."
+)
+
+def _parse(horizon_filepath: str) -> numpy.ndarray:
+    """Parse a horizon file, with values that are not numbers as NaN."""
+    try:
+        # The C parser of loadtxt is much faster, but only handles files
+        # without errors.
+        data = numpy.loadtxt(horizon_filepath, delimiter="\t", dtype=float, ndmin=2)
+    except ValueError:
+        data = None
+    if data is None or data.shape != (len(data), 2) or len(data) < 2:
+        # genfromtxt turns invalid values into NaN and gives the shapes the
+        # messages below describe.
+        data = numpy.genfromtxt(horizon_filepath, delimiter="\t", dtype=float)
+    return data
+
+
+def validate_horizon(data: numpy.ndarray) -> str:
+    """Return why parsed horizon data is invalid, or "" if it is valid."""
+    shape = data.shape
+    if len(shape) != 2:
+        return (
+            "Invalid horizon file: The array shape cannot be determined. "
+            + _SHAPE_HINT
+        )
+    if shape[0] < 2 or shape[1] != 2:
+        return (
+            f"Invalid horizon file: The array shape is {shape}, which is invalid. "
+            + _SHAPE_HINT
+        )
+    if numpy.isnan(data).any():
+        return (
+            "Invalid horizon file: The data seems to contain non-float values. "
+            "Please check (two columns, tab delimiter, decimal points)."
+        )
+
+    message = ""
+    azimuths = data[:, 0]
+    first, last = int(azimuths[0]), int(azimuths[-1])
+    if first != 0 or last != 360:
+        message = (
+            f"Invalid horizon file: Azimuth values ({first}° to {last}°) do not "
+            "contain 0° and/or 360°. I cannot judge whether the full range of "
+            "applicable azimuths is covered by the horizon file. Please check..."
+        )
+    # Report the last place the azimuths stop ascending.
+    if (descending := numpy.flatnonzero(numpy.diff(azimuths) <= 0)).size:
+        message = (
+            "Invalid horizon file: Azimuth values are not ascending around value "
+            f"of {azimuths[descending[-1]]}. Please check..."
+        )
+    return message
+
+
+def _to_map(data: numpy.ndarray) -> HorizonMap:
+    return tuple(map(tuple, data.tolist()))
+
+
+def _disk_cache_file(
+    cache_dir: str, path: str, signature: tuple[int, int], variant: str = ""
+) -> str:
+    digest = hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+    return os.path.join(
+        cache_dir, f"{digest}-{signature[0]}-{signature[1]}{variant}.npy"
+    )
+
+
+def _load_from_disk(cache_file: str) -> numpy.ndarray | None:
+    try:
+        data = numpy.load(cache_file, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    if data.ndim != 2 or data.shape[1] != 2:
+        return None
+    return data
+
+
+def _save_to_disk(cache_file: str, data: numpy.ndarray) -> None:
+    """Write the parsed horizon data, replacing older versions of the file."""
+    cache_dir, name = os.path.split(cache_file)
+    prefix = name.split("-", 1)[0]
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in os.listdir(cache_dir):
+            if stale.startswith(f"{prefix}-") and stale != name:
+                os.remove(os.path.join(cache_dir, stale))
+        temporary = f"{cache_file}.tmp"
+        with open(temporary, "wb") as file:
+            numpy.save(file, data, allow_pickle=False)
+        os.replace(temporary, cache_file)
+    except OSError:
+        # The cache is only an optimization.
+        pass
+
+
+def file_signature(horizon_filepath: str) -> tuple[int, int] | None:
+    """Return the modification time and size of a file, or None if it is missing."""
+    try:
+        stat = os.stat(horizon_filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_horizon_file(
+    horizon_filepath: str,
+    cache_dir: str | None = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> tuple[HorizonMap | None, str]:
+    """Load and validate a horizon file.
+
+    Imported profiles are simplified to within tolerance degrees. Returns
+    the horizon map and an empty message, or None and a message describing
+    why the file is invalid. Does blocking I/O.
+    """
+    if (signature := file_signature(horizon_filepath)) is None:
+        return None, (
+            f"Invalid horizon file: Horizon file '{horizon_filepath}' not found! "
+            "Specify path like e.g. '/config/www/horizon.txt'"
+        )
+    imported = is_import_file(horizon_filepath)
+
+    cache_file = None
+    data = None
+    if cache_dir is not None:
+        cache_file = _disk_cache_file(
+            cache_dir,
+            horizon_filepath,
+            signature,
+            f"-{tolerance:g}" if imported else "",
+        )
+        data = _load_from_disk(cache_file)
+
+    if data is None:
+        if not imported:
+            data = _parse(horizon_filepath)
+        else:
+            try:
+                data = import_horizon_profile(horizon_filepath, tolerance)
+            except (OSError, ValueError) as err:
+                return None, (
+                    f"Invalid horizon file: The profile cannot be imported: {err}. "
+                    "Please check..."
+                )
+        if message := validate_horizon(data):
+            return None, message
+        if cache_file is not None:
+            _save_to_disk(cache_file, data)
+
+    return _to_map(data), ""
+
+
+@dataclass(frozen=True, slots=True)
+class HorizonProfile:
+    """The horizon elevation of a horizon map by azimuth.
+
+    The elevation is tabulated every 1 / BINS_PER_DEGREE degrees, and looked
+    up by interpolating between the two neighbouring bins. When all azimuths
+    of the map are on that grid this is the same piecewise linear function
+    as the map itself. Maps with azimuths between the bins keep their
+    breakpoints instead, so the shading never differs from the library.
+    """
+
+    table: numpy.ndarray | None
+    azimuths: numpy.ndarray
+    elevations: numpy.ndarray
+
+    @classmethod
+    def from_map(cls, horizon_map: Sequence[Sequence[float]]) -> HorizonProfile:
+        """Build the profile of a horizon map."""
+        data = numpy.array(horizon_map, dtype=float).reshape(-1, 2)
+        azimuths, elevations = data[:, 0], data[:, 1]
+        table = None
+        bins = azimuths * BINS_PER_DEGREE
+        whole_bins = numpy.rint(bins)
+        # Computed azimuths can be a rounding error off the grid
+        # (0.1 + 0.2 is 0.30000000000000004); they are snapped to it.
+        if numpy.allclose(bins, whole_bins, rtol=0, atol=1e-6):
+            # Dividing whole numbers gives the grid azimuths without the
+            # rounding errors of multiplying by the bin width.
+            grid = numpy.arange(360 * BINS_PER_DEGREE + 1) / BINS_PER_DEGREE
+            table = numpy.interp(grid, whole_bins / BINS_PER_DEGREE, elevations)
+        return cls(table, azimuths, elevations)
+
+    def elevation(self, azimuth: numpy.ndarray) -> numpy.ndarray:
+        """Return the horizon elevation at azimuths between 0° and 360°."""
+        if self.table is None:
+            return numpy.interp(azimuth, self.azimuths, self.elevations)
+        position = numpy.clip(azimuth, 0, 360) * BINS_PER_DEGREE
+        index = numpy.minimum(position.astype(numpy.intp), len(self.table) - 2)
+        lower = self.table[index]
+        return lower + (position - index) * (self.table[index + 1] - lower)
+
+
+def horizon_profiles(
+    horizon_maps: Sequence[Sequence[Sequence[float]]],
+) -> list[HorizonProfile]:
+    """Build the profile of every array, sharing it between equal maps."""
+    profiles: dict[tuple[tuple[float, float], ...], HorizonProfile] = {}
+    result = []
+    for horizon_map in horizon_maps:
+        key = tuple(map(tuple, horizon_map))
+        if (profile := profiles.get(key)) is None:
+            profile = profiles[key] = HorizonProfile.from_map(horizon_map)
+        result.append(profile)
+    return result
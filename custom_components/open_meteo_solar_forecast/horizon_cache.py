@@ -0,0 +1,159 @@
+"""Horizon files shared by the config entries of the integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+import os
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DATA_HORIZON_CACHE, DOMAIN, LOGGER
+from .horizon import (
+    HorizonMap,
+    HorizonProfile,
+    file_signature,
+    load_horizon_file,
+)
+from .horizon_import import is_import_file
+
+
+@dataclass(frozen=True, slots=True)
+class HorizonFile:
+    """A loaded horizon file, for the modification time and size it had."""
+
+    signature: tuple[int, int] | None
+    horizon_map: HorizonMap | None
+    profile: HorizonProfile | None
+    message: str
+
+
+# A horizon file by canonical path, with the tolerance of imported profiles.
+HorizonFileKey = tuple[str, float | None]
+
+
+def _load_horizon_files(
+    paths: Iterable[str],
+    cache_dir: str,
+    tolerance: float,
+    loaded: Mapping[HorizonFileKey, HorizonFile],
+) -> dict[str, tuple[HorizonFileKey, HorizonFile]]:
+    """Load horizon files that changed since they were loaded.
+
+    Returns the key and the horizon file of every path.
+    """
+    result = {}
+    for path in paths:
+        key = (
+            os.path.realpath(path),
+            tolerance if is_import_file(path) else None,
+        )
+        signature = file_signature(key[0])
+        if (known := loaded.get(key)) is None or known.signature != signature:
+            horizon_map, message = load_horizon_file(path, cache_dir, tolerance)
+            profile = (
+                None if horizon_map is None else HorizonProfile.from_map(horizon_map)
+            )
+            known = HorizonFile(signature, horizon_map, profile, message)
+        result[path] = (key, known)
+    return result
+
+
+class HorizonCache:
+    """Keep the horizon files used by the config entries in memory.
+
+    Files are identified by their canonical path (and the tolerance imported
+    profiles are simplified with), so entries referring to the same file
+    share one horizon map and one lookup table. A file is only loaded again
+    when its modification time or size changed, and dropped when the last
+    entry using it stops doing so.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._cache_dir = hass.config.path(STORAGE_DIR, f"{DOMAIN}_horizons")
+        self._lock = asyncio.Lock()
+        self._files: dict[HorizonFileKey, HorizonFile] = {}
+        self._users: dict[HorizonFileKey, set[str]] = {}
+
+    async def async_acquire(
+        self, entry_id: str, paths: Sequence[str], tolerance: float
+    ) -> dict[str, HorizonMap]:
+        """Load the horizon files of an entry and return their maps by path.
+
+        The entry then uses exactly these files. If a file is invalid,
+        ValueError is raised with the reason and the files the entry used
+        before are kept.
+        """
+        # One load at a time, so entries set up together parse a file once.
+        async with self._lock:
+            loaded = await self.hass.async_add_executor_job(
+                _load_horizon_files,
+                paths,
+                self._cache_dir,
+                tolerance,
+                dict(self._files),
+            )
+
+        for key, horizon_file in loaded.values():
+            if horizon_file.horizon_map is None:
+                # Remembered for files in use, so polling a broken file
+                # does not parse it again until it changes.
+                if key in self._users:
+                    self._files[key] = horizon_file
+                raise ValueError(horizon_file.message)
+
+        maps: dict[str, HorizonMap] = {}
+        for path, (key, horizon_file) in loaded.items():
+            self._files[key] = horizon_file
+            self._users.setdefault(key, set()).add(entry_id)
+            maps[path] = horizon_file.horizon_map
+        self._async_release(entry_id, keep={key for key, _ in loaded.values()})
+        return maps
+
+    @callback
+    def async_release(self, entry_id: str) -> None:
+        """Release all horizon files of an entry."""
+        self._async_release(entry_id, keep=set())
+
+    @callback
+    def _async_release(self, entry_id: str, keep: set[HorizonFileKey]) -> None:
+        for key in [key for key in self._users if key not in keep]:
+            users = self._users[key]
+            users.discard(entry_id)
+            if not users:
+                LOGGER.debug("Releasing horizon file %s", key[0])
+                del self._users[key]
+                self._files.pop(key, None)
+
+    @callback
+    def profiles(self, horizon_maps: Sequence[HorizonMap]) -> list[HorizonProfile]:
+        """Return the horizon profile of every array.
+
+        Maps handed out by the cache use the lookup table of their file;
+        other maps (such as the flat default horizon) get their own.
+        """
+        shared = {
+            id(horizon_file.horizon_map): horizon_file.profile
+            for horizon_file in self._files.values()
+            if horizon_file.profile is not None
+        }
+        profiles = []
+        for horizon_map in horizon_maps:
+            if (profile := shared.get(id(horizon_map))) is None:
+                profile = shared[id(horizon_map)] = HorizonProfile.from_map(
+                    horizon_map
+                )
+            profiles.append(profile)
+        return profiles
+
+
+@callback
+def async_get_horizon_cache(hass: HomeAssistant) -> HorizonCache:
+    """Return the horizon cache shared by all config entries."""
+    if (cache := hass.data.get(DATA_HORIZON_CACHE)) is None:
+        cache = hass.data[DATA_HORIZON_CACHE] = HorizonCache(hass)
+    return cache
@@ -0,0 +1,219 @@
+"""Import of horizon profiles exported by PVGIS and LiDAR tools.
+
+Supported are CSV files (with tab, comma, semicolon or whitespace delimited
+columns, decimal commas with semicolons) and JSON files. The azimuth and
+elevation columns are found by their header; without one, the first two
+columns are used. PVGIS exports (columns A and H_hor) count the azimuth
+from south, -180° to 180°, and are converted to azimuths from north.
+
+Detailed surveys are simplified to far fewer points, with the elevation of
+the simplified profile within a tolerance of the survey at every azimuth.
+
+This module only depends on NumPy, so the tester script can use it as well.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+import json
+import os
+import re
+from typing import Any
+
+import numpy
+
+# File name extensions of the profiles imported by this module.
+IMPORT_EXTENSIONS = (".csv", ".json")
+
+# Maximum deviation of the simplified profile from the survey, in degrees.
+DEFAULT_TOLERANCE = 0.5
+
+# Beginnings of the column names of other tools.
+_AZIMUTH_PREFIXES = ("az",)
+_ELEVATION_PREFIXES = ("elev", "alt", "height", "horizon", "h_hor")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def is_import_file(horizon_filepath: str) -> bool:
+    """Return whether a horizon file is imported by this module."""
+    return os.path.splitext(horizon_filepath)[1].lower() in IMPORT_EXTENSIONS
+
+
+def _split(line: str) -> list[str]:
+    if "\t" in line:
+        return line.split("\t")
+    if ";" in line:
+        # Semicolons separate values with decimal commas.
+        return [cell.replace(",", ".") for cell in line.split(";")]
+    if "," in line:
+        return line.split(",")
+    return _WHITESPACE.split(line)
+
+
+def _columns(names: list[str]) -> tuple[int, int, bool] | None:
+    """Return the azimuth and elevation column and whether it is PVGIS data."""
+    names = [name.strip().strip('"').lower() for name in names]
+    if "a" in names and "h_hor" in names:
+        return names.index("a"), names.index("h_hor"), True
+
+    def first(prefixes: tuple[str, ...]) -> int | None:
+        return next(
+            (index for index, name in enumerate(names) if name.startswith(prefixes)),
+            None,
+        )
+
+    if (azimuth := first(_AZIMUTH_PREFIXES)) is None or (
+        elevation := first(_ELEVATION_PREFIXES)
+    ) is None:
+        return None
+    return azimuth, elevation, False
+
+
+def _csv_points(lines: Iterable[str]) -> Iterator[tuple[float, float, bool]]:
+    """Yield the azimuth, elevation and PVGIS flag of every data row.
+
+    Rows that are not numbers (metadata, footers) are skipped.
+    """
+    azimuth_column, elevation_column, pvgis = 0, 1, False
+    for line in lines:
+        if not (line := line.strip()) or line.startswith("#"):
+            continue
+        cells = _split(line)
+        try:
+            azimuth = float(cells[azimuth_column])
+            elevation = float(cells[elevation_column])
+        except (IndexError, ValueError):
+            if (columns := _columns(cells)) is not None:
+                azimuth_column, elevation_column, pvgis = columns
+            continue
+        yield azimuth, elevation, pvgis
+
+
+def _json_points(data: Any) -> Iterator[tuple[float, float, bool]]:
+    """Yield the azimuth, elevation and PVGIS flag of every JSON point."""
+    # PVGIS nests the profile in its outputs.
+    if isinstance(data, dict):
+        data = data.get("outputs", data)
+    if isinstance(data, dict):
+        data = data.get("horizon_profile", data.get("horizon", data))
+    if not isinstance(data, list):
+        raise ValueError("no list of horizon points")
+    for point in data:
+        if not isinstance(point, dict):
+            yield float(point[0]), float(point[1]), False
+            continue
+        keys = [str(key) for key in point]
+        if (columns := _columns(keys)) is None:
+            raise ValueError("points need an azimuth and an elevation")
+        values = list(point.values())
+        azimuth, elevation, pvgis = columns
+        yield float(values[azimuth]), float(values[elevation]), pvgis
+
+
+def _read_points(horizon_filepath: str) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Read the azimuths from north and elevations of a horizon profile."""
+    azimuths = array("d")
+    elevations = array("d")
+    with open(horizon_filepath, encoding="utf-8-sig") as file:
+        if horizon_filepath.lower().endswith(".json"):
+            try:
+                points = _json_points(json.load(file))
+            except json.JSONDecodeError as err:
+                raise ValueError(f"invalid JSON ({err})") from err
+        else:
+            points = _csv_points(file)
+        # A single pass, keeping only two compact arrays of the values.
+        try:
+            for azimuth, elevation, pvgis in points:
+                if pvgis:
+                    azimuth += 180
+                elif azimuth != 360:
+                    # 360° stays the end of the profile instead of a second 0°.
+                    azimuth %= 360
+                # Rounded, so converted azimuths land on the whole degrees.
+                azimuths.append(round(azimuth, 9))
+                elevations.append(elevation)
+        except (IndexError, TypeError) as err:
+            raise ValueError("points need an azimuth and an elevation") from err
+
+    return (
+        numpy.frombuffer(azimuths, dtype=float),
+        numpy.frombuffer(elevations, dtype=float),
+    )
+
+
+def _close_profile(
+    azimuths: numpy.ndarray, elevations: numpy.ndarray
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Sort the points and extend the profile to 0° and 360° if needed."""
+    azimuths, first = numpy.unique(azimuths, return_index=True)
+    elevations = elevations[first]
+    if azimuths[0] > 0 or azimuths[-1] < 360:
+        # Interpolate across north between the last and the first point.
+        span = azimuths[0] + 360 - azimuths[-1]
+        north = elevations[-1] + (elevations[0] - elevations[-1]) * (
+            (360 - azimuths[-1]) / span
+        )
+        if azimuths[0] > 0:
+            azimuths = numpy.r_[0.0, azimuths]
+            elevations = numpy.r_[north, elevations]
+        if azimuths[-1] < 360:
+            azimuths = numpy.r_[azimuths, 360.0]
+            elevations = numpy.r_[elevations, north]
+    return azimuths, elevations
+
+
+def simplify_profile(
+    azimuths: numpy.ndarray, elevations: numpy.ndarray, tolerance: float
+) -> numpy.ndarray:
+    """Simplify a profile with ascending azimuths in one pass.
+
+    Segments are extended from their start for as long as some line from it
+    stays within the tolerance of every point (the slopes allowed by all
+    points so far still overlap). The segment then ends on that line at the
+    last point that fit, which starts the next segment. As both profiles
+    are linear between the points, the simplified one is within the
+    tolerance of the original at every azimuth.
+    """
+    count = len(azimuths)
+    if tolerance <= 0 or count <= 2:
+        return numpy.column_stack((azimuths, elevations))
+
+    xs, ys = azimuths.tolist(), elevations.tolist()
+    result = [(xs[0], ys[0])]
+    start_x, start_y = xs[0], ys[0]
+    low, high = -numpy.inf, numpy.inf
+    for index in range(1, count):
+        dx = xs[index] - start_x
+        new_low = max(low, (ys[index] - tolerance - start_y) / dx)
+        new_high = min(high, (ys[index] + tolerance - start_y) / dx)
+        if new_low > new_high:
+            # The previous point ends the segment, on its middle line.
+            previous_x = xs[index - 1]
+            start_y += (low + high) / 2 * (previous_x - start_x)
+            start_x = previous_x
+            result.append((start_x, start_y))
+            dx = xs[index] - start_x
+            new_low = (ys[index] - tolerance - start_y) / dx
+            new_high = (ys[index] + tolerance - start_y) / dx
+        low, high = new_low, new_high
+    result.append((xs[-1], start_y + (low + high) / 2 * (xs[-1] - start_x)))
+    return numpy.array(result, dtype=float)
+
+
+def import_horizon_profile(horizon_filepath: str, tolerance: float) -> numpy.ndarray:
+    """Import a horizon profile as ascending (azimuth, elevation) rows.
+
+    Raises ValueError with the reason if the file cannot be imported.
+    Does blocking I/O.
+    """
+    try:
+        azimuths, elevations = _read_points(horizon_filepath)
+    except UnicodeDecodeError as err:
+        raise ValueError("the file is not text") from err
+    if len(azimuths) < 2:
+        raise ValueError("it has less than two points")
+    if not (numpy.isfinite(azimuths).all() and numpy.isfinite(elevations).all()):
+        raise ValueError("it contains values that are not numbers")
+    return simplify_profile(*_close_profile(azimuths, elevations), tolerance)
@@ -0,0 +1,124 @@
+"""Look-ahead horizons of the power and energy forecast sensors."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from .const import CONF_ENERGY_WINDOWS, CONF_POWER_OFFSETS, FORECAST_SLOT
+
+# Offsets and windows of the sensors every entry has, by sensor key.
+BUILTIN_POWER_OFFSETS: dict[str, timedelta] = {
+    "power_production_next_15minutes": timedelta(minutes=15),
+    "power_production_next_30minutes": timedelta(minutes=30),
+    "power_production_next_hour": timedelta(hours=1),
+    "power_production_next_12hours": timedelta(hours=12),
+    "power_production_next_24hours": timedelta(hours=24),
+}
+BUILTIN_ENERGY_WINDOWS: dict[str, int] = {
+    "energy_next_hour": 1,
+}
+
+# The forecast covers 16 days ahead.
+MAX_LOOKAHEAD = timedelta(days=16)
+
+_DURATION = re.compile(r"(\d+)\s*([dhm])")
+_UNITS = {"d": timedelta(days=1), "h": timedelta(hours=1), "m": timedelta(minutes=1)}
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse a duration like "45m", "2h", "1h30m" or "1d".
+
+    Raises ValueError if the text is not a positive duration.
+    """
+    compact = str(text).strip().lower().replace(" ", "")
+    parts = _DURATION.findall(compact)
+    if not parts or "".join(value + unit for value, unit in parts) != compact:
+        raise ValueError(f"Invalid duration: {text}")
+    duration = sum((int(value) * _UNITS[unit] for value, unit in parts), timedelta())
+    if not timedelta() < duration <= MAX_LOOKAHEAD:
+        raise ValueError(f"Duration out of range: {text}")
+    return duration
+
+
+def format_duration(duration: timedelta) -> str:
+    """Format a duration the way parse_duration reads it, e.g. "1h30m"."""
+    minutes = int(duration.total_seconds()) // 60
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    return "".join(
+        f"{value}{unit}"
+        for value, unit in ((days, "d"), (hours, "h"), (minutes, "m"))
+        if value
+    )
+
+
+def parse_power_offset(text: str) -> timedelta:
+    """Parse a power look-ahead, which has to be a whole number of slots."""
+    offset = parse_duration(text)
+    if offset % FORECAST_SLOT:
+        raise ValueError(f"Power look-ahead is not a multiple of 15 minutes: {text}")
+    return offset
+
+
+def parse_energy_window(text: str) -> int:
+    """Parse an energy window, which has to be a whole number of hours."""
+    window = parse_duration(text)
+    if window % timedelta(hours=1):
+        raise ValueError(f"Energy window is not a whole number of hours: {text}")
+    return window // timedelta(hours=1)
+
+
+@dataclass(frozen=True, slots=True)
+class LookaheadHorizons:
+    """Power offsets and energy windows (in hours) to evaluate, by sensor key."""
+
+    power_offsets: Mapping[str, timedelta]
+    energy_windows: Mapping[str, int]
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> LookaheadHorizons:
+        """Combine the built-in horizons with those configured in options.
+
+        Configured horizons that a built-in sensor already covers are
+        skipped. Raises ValueError for invalid horizons.
+        """
+        power_offsets = dict(BUILTIN_POWER_OFFSETS)
+        for text in options.get(CONF_POWER_OFFSETS, []):
+            offset = parse_power_offset(text)
+            if offset not in power_offsets.values():
+                power_offsets[f"power_production_next_{format_duration(offset)}"] = offset
+
+        energy_windows = dict(BUILTIN_ENERGY_WINDOWS)
+        for text in options.get(CONF_ENERGY_WINDOWS, []):
+            hours = parse_energy_window(text)
+            if hours not in energy_windows.values():
+                energy_windows[f"energy_next_{hours}h"] = hours
+
+        return cls(power_offsets, energy_windows)
+
+    @property
+    def sensor_keys(self) -> frozenset[str]:
+        """Return the keys of all look-ahead sensors."""
+        return frozenset((*self.power_offsets, *self.energy_windows))
+
+
+def validate_horizons(
+    power_offsets: Iterable[str], energy_windows: Iterable[str]
+) -> dict[str, str]:
+    """Validate configured horizons and return config flow errors."""
+    errors = {}
+    try:
+        for text in power_offsets:
+            parse_power_offset(text)
+    except ValueError:
+        errors[CONF_POWER_OFFSETS] = "invalid_power_offset"
+    try:
+        for text in energy_windows:
+            parse_energy_window(text)
+    except ValueError:
+        errors[CONF_ENERGY_WINDOWS] = "invalid_energy_window"
+    return errors
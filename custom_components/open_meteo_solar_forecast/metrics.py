@@ -0,0 +1,142 @@
+"""Rolling performance metrics of the Open-Meteo Solar Forecast integration."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+from typing import Any
+
+# Number of samples the percentiles are computed over.
+SAMPLES = 100
+
+# Window of the hourly counters, in seconds.
+HOUR = 3600
+
+
+class RollingStat:
+    """The most recent samples of a measurement."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self) -> None:
+        """Initialize an empty measurement."""
+        self._samples: deque[float] = deque(maxlen=SAMPLES)
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self._samples.append(value)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return a percentile of the samples (nearest rank), if there are any."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[round(fraction * (len(ordered) - 1))]
+
+    def summary(self) -> dict[str, Any]:
+        """Return the count, last value, mean and percentiles of the samples."""
+        samples = self._samples
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "last": samples[-1],
+            "mean": sum(samples) / len(samples),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": max(samples),
+        }
+
+
+class HourlyTotal:
+    """Sum of values recorded during the last hour."""
+
+    __slots__ = ("_events",)
+
+    def __init__(self) -> None:
+        """Initialize an empty total."""
+        self._events: deque[tuple[float, float]] = deque()
+
+    def _prune(self, now: float) -> None:
+        events = self._events
+        while events and events[0][0] < now - HOUR:
+            events.popleft()
+
+    def add(self, value: float = 1) -> None:
+        """Record a value now."""
+        now = monotonic()
+        self._prune(now)
+        self._events.append((now, value))
+
+    def total(self) -> float:
+        """Return the sum of the values recorded during the last hour."""
+        self._prune(monotonic())
+        return sum(value for _, value in self._events)
+
+
+class Metrics:
+    """Performance metrics of a config entry.
+
+    Durations are in seconds. Weather response sizes are counted in data
+    values, as the library only hands out the decoded response.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.http_latency = RollingStat()
+        self.response_values = RollingStat()
+        self.compute_time = RollingStat()
+        self.store_load_time = RollingStat()
+        self.store_save_time = RollingStat()
+        self.callback_time = RollingStat()
+        self._callback_seconds = HourlyTotal()
+        self._state_writes: dict[str, HourlyTotal] = {}
+
+    @contextmanager
+    def timed(self, stat: RollingStat) -> Iterator[None]:
+        """Add the duration of the enclosed block to a measurement."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stat.add(perf_counter() - start)
+
+    def record_response(self, response: Any) -> None:
+        """Record the size of a weather response."""
+        self.response_values.add(
+            sum(len(values) for values in response.get("minutely_15", {}).values())
+        )
+
+    def record_callback(self, duration: float) -> None:
+        """Record the time an event loop callback took."""
+        self.callback_time.add(duration)
+        self._callback_seconds.add(duration)
+
+    def record_state_write(self, key: str) -> None:
+        """Record a state write of a sensor."""
+        if (writes := self._state_writes.get(key)) is None:
+            writes = self._state_writes[key] = HourlyTotal()
+        writes.add()
+
+    def callback_seconds_last_hour(self) -> float:
+        """Return the event loop time spent in callbacks during the last hour."""
+        return self._callback_seconds.total()
+
+    def state_writes_last_hour(self) -> dict[str, int]:
+        """Return the number of state writes per sensor during the last hour."""
+        return {key: int(writes.total()) for key, writes in self._state_writes.items()}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics."""
+        return {
+            "http_latency": self.http_latency.summary(),
+            "response_values": self.response_values.summary(),
+            "compute_time": self.compute_time.summary(),
+            "store_load_time": self.store_load_time.summary(),
+            "store_save_time": self.store_save_time.summary(),
+            "callback_time": self.callback_time.summary(),
+            "callback_seconds_last_hour": self.callback_seconds_last_hour(),
+            "state_writes_last_hour": self.state_writes_last_hour(),
+        }
@@ -0,0 +1,386 @@
+"""Data models for the Open-Meteo Solar Forecast integration."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from open_meteo_solar_forecast import Estimate
+
+from .const import (
+    ATTR_WATTS,
+    ATTR_WH_PERIOD,
+    ATTR_WH_PERIOD_15M,
+    ATTRIBUTE_MODE_DOWNSAMPLED,
+    ATTRIBUTE_MODE_FULL,
+    ATTRIBUTE_MODE_HOURLY,
+    DEFAULT_ATTRIBUTE_MAX_POINTS,
+    FORECAST_SLOT,
+)
+from .lookahead import LookaheadHorizons
+
+
+class TimeSeries:
+    """A forecast series as sorted epoch seconds and parallel values.
+
+    Lookups use binary search instead of scanning the datetime-keyed dicts
+    of the forecast library, but give the same results: values keep their
+    types and sums are accumulated in the same order.
+    """
+
+    __slots__ = ("epochs", "keys", "values")
+
+    def __init__(self, data: Mapping[datetime, Any]) -> None:
+        """Initialize the series from a dict with ascending datetime keys."""
+        self.keys: list[datetime] = list(data)
+        self.values: list[Any] = list(data.values())
+        self.epochs = array("q", map(int, map(datetime.timestamp, self.keys)))
+
+    def __len__(self) -> int:
+        """Return the number of values."""
+        return len(self.values)
+
+    def span(self, begin: datetime, end: datetime) -> range:
+        """Return the indexes of the values in [begin, end)."""
+        first = bisect_left(self.epochs, begin.timestamp())
+        return range(first, bisect_left(self.epochs, end.timestamp(), first))
+
+    def value_at(self, at: datetime) -> Any:
+        """Return the value in effect at a time.
+
+        Like the library, this is None before the first and from the last
+        timestamp on, as the last value has no known end.
+        """
+        index = bisect_right(self.epochs, at.timestamp())
+        if index == 0 or index == len(self.epochs):
+            return None
+        return self.values[index - 1]
+
+    def values_at(self, times: Iterable[datetime]) -> list[Any]:
+        """Return the values in effect at ascending times, in one pass."""
+        epochs = self.epochs
+        count = len(epochs)
+        index = 0
+        result = []
+        for at in times:
+            timestamp = at.timestamp()
+            while index < count and epochs[index] <= timestamp:
+                index += 1
+            result.append(
+                None if index == 0 or index == count else self.values[index - 1]
+            )
+        return result
+
+    def sums_until(self, begin: datetime, ends: Iterable[datetime]) -> list[Any]:
+        """Return the sums of the values in [begin, end) for ascending ends.
+
+        The sums are accumulated in one pass, adding values in the same
+        order as sum() does for each interval on its own.
+        """
+        epochs = self.epochs
+        values = self.values
+        count = len(epochs)
+        index = bisect_left(epochs, begin.timestamp())
+        total = 0
+        result = []
+        for end in ends:
+            timestamp = end.timestamp()
+            while index < count and epochs[index] < timestamp:
+                total += values[index]
+                index += 1
+            result.append(total)
+        return result
+
+    def sum(self, begin: datetime, end: datetime) -> Any:
+        """Return the sum of the values in [begin, end)."""
+        total = 0
+        values = self.values
+        for index in self.span(begin, end):
+            total += values[index]
+        return total
+
+    def energy(self, begin: datetime, end: datetime) -> Any:
+        """Return the energy in Wh of power values in [begin, end).
+
+        Each value holds until the next timestamp, or until end.
+        """
+        total = 0
+        epochs = self.epochs
+        values = self.values
+        end_epoch = int(end.timestamp())
+        span = self.span(begin, end)
+        last = len(epochs) - 1
+        for index in span:
+            following = epochs[index + 1] if index < last else end_epoch
+            following = min(following, end_epoch)
+            total += values[index] * ((following - epochs[index]) / 3600)
+        return total
+
+
+@dataclass(slots=True)
+class ArrayEstimate:
+    """Contribution of a single array to the estimate of a multi-array entry."""
+
+    watts: dict[datetime, int]
+    wh_period_15m: dict[datetime, float]
+    wh_days: dict[date, float]
+
+
+@dataclass(frozen=True, slots=True)
+class DaySummary:
+    """Summary of the forecast of a single (local) day."""
+
+    energy: Any
+    peak_time: datetime | None = None
+    peak_watts: Any = None
+
+
+def _summarize_day(series: TimeSeries, span: range, energy: Any) -> DaySummary:
+    if not span:
+        return DaySummary(energy)
+
+    keys = series.keys
+    values = series.values
+    peak_watts = max(values[index] for index in span)
+    # Like the library, the first time the highest power is reached.
+    peak_time = next(keys[index] for index in span if values[index] == peak_watts)
+    return DaySummary(energy=energy, peak_time=peak_time, peak_watts=peak_watts)
+
+
+@dataclass
+class IndexedEstimate(Estimate):
+    """Estimate served from sorted time series instead of dict scans.
+
+    The power and energy series are indexed once per forecast, so the
+    point-in-time and interval queries of the sensors use binary search, and
+    a summary of every day is worked out up front. The daily energy sensors
+    also expose the series of their day as
+    attributes; those are serialized the first time they are needed and
+    reused for every state write until the next update.
+
+    For multi-array entries, the contribution of every array is kept as
+    well, from the same computation as the combined estimate.
+    """
+
+    arrays: list[ArrayEstimate] = field(
+        default_factory=list, repr=False, compare=False
+    )
+    _series: dict[str, TimeSeries] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _day_attributes: dict[tuple[date, str, int], dict[str, dict[str, Any]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    day_summaries: dict[date, DaySummary] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _lookahead: tuple[LookaheadHorizons, int, dict[str, Any]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _energy_forecasts: dict[str, dict[str, dict[str, Any]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _array_series: list[dict[str, TimeSeries]] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Index the (ascending) power and energy series."""
+        self._series = {
+            attribute: TimeSeries(getattr(self, attribute))
+            for attribute in (ATTR_WATTS, ATTR_WH_PERIOD, ATTR_WH_PERIOD_15M)
+        }
+
+        self._array_series = [
+            {
+                ATTR_WATTS: TimeSeries(array.watts),
+                ATTR_WH_PERIOD_15M: TimeSeries(array.wh_period_15m),
+            }
+            for array in self.arrays
+        ]
+
+        watts = self._series[ATTR_WATTS]
+        days = sorted({*self.wh_days, *(key.date() for key in watts.keys)})
+        for day in days:
+            start = self._day_start(day)
+            self.day_summaries[day] = _summarize_day(
+                watts,
+                watts.span(start, start + timedelta(days=1)),
+                self.wh_days.get(day, 0),
+            )
+
+    @classmethod
+    def from_estimate(
+        cls, estimate: Estimate, arrays: list[ArrayEstimate] | None = None
+    ) -> IndexedEstimate:
+        """Index an estimate, with the breakdown by array if there is one."""
+        return cls(
+            **{item.name: getattr(estimate, item.name) for item in fields(Estimate)},
+            arrays=arrays or [],
+        )
+
+    def _day_start(self, day: date) -> datetime:
+        return datetime.combine(day, time(), self.api_timezone)
+
+    @property
+    def energy_production_today_remaining(self) -> float:
+        """Return estimated energy produced in rest of today."""
+        now = self.now()
+        return self._series[ATTR_WATTS].energy(
+            now, self._day_start(now.date()) + timedelta(days=1)
+        )
+
+    @property
+    def energy_current_hour(self) -> float:
+        """Return the estimated energy production for the current hour."""
+        hour = self.now().replace(minute=0, second=0, microsecond=0)
+        return self._series[ATTR_WH_PERIOD].sum(hour, hour + timedelta(hours=1))
+
+    def day_summary(self, specific_date: date) -> DaySummary:
+        """Return the summary of a day, which is empty if it is not forecast."""
+        if (summary := self.day_summaries.get(specific_date)) is not None:
+            return summary
+        return DaySummary(energy=0)
+
+    def day_production(self, specific_date: date) -> float:
+        """Return the day production."""
+        return self.day_summary(specific_date).energy
+
+    def peak_production_time(self, specific_date: date) -> datetime:
+        """Return the peak time on a specific date."""
+        if (peak := self.day_summary(specific_date).peak_time) is None:
+            raise RuntimeError("No peak production time found")
+        return peak
+
+    def power_production_at_time(self, time: datetime) -> int:
+        """Return estimated power production at a specific time."""
+        return self._series[ATTR_WATTS].value_at(time) or 0
+
+    def sum_energy_production(self, period_hours: int) -> float:
+        """Return the sum of the energy production."""
+        now = self.now().replace(minute=59, second=59, microsecond=999)
+        return self._series[ATTR_WH_PERIOD].sum(
+            now, now + timedelta(hours=period_hours)
+        )
+
+    def series(self, attribute: str, array: int | None = None) -> TimeSeries:
+        """Return an indexed series of the estimate, or of one of its arrays.
+
+        The arrays have the watts and wh_period_15m series.
+        """
+        if array is None:
+            return self._series[attribute]
+        return self._array_series[array][attribute]
+
+    def array_power_production_now(self, index: int) -> int:
+        """Return the estimated power production of an array now."""
+        return self._array_series[index][ATTR_WATTS].value_at(self.now()) or 0
+
+    def array_day_production(self, index: int, specific_date: date) -> float:
+        """Return the day production of an array."""
+        return self.arrays[index].wh_days.get(specific_date, 0)
+
+    def lookahead(self, horizons: LookaheadHorizons) -> dict[str, Any]:
+        """Return the values of all look-ahead sensors, by sensor key.
+
+        Power is looked up at now plus each offset, like
+        power_production_at_time(), and energy summed over the whole hours
+        after the current one, like sum_energy_production(). All horizons
+        are evaluated in a single pass and only once per slot, as none of
+        them changes within a slot.
+        """
+        now = self.now()
+        slot = int(now.timestamp() // FORECAST_SLOT.total_seconds())
+        if (cached := self._lookahead) is not None and (
+            cached[0] is horizons and cached[1] == slot
+        ):
+            return cached[2]
+
+        values: dict[str, Any] = {}
+        offsets = sorted(horizons.power_offsets.items(), key=lambda item: item[1])
+        for (key, _), value in zip(
+            offsets,
+            self._series[ATTR_WATTS].values_at(now + offset for _, offset in offsets),
+            strict=True,
+        ):
+            values[key] = value or 0
+
+        begin = now.replace(minute=59, second=59, microsecond=999)
+        windows = sorted(horizons.energy_windows.items(), key=lambda item: item[1])
+        for (key, _), value in zip(
+            windows,
+            self._series[ATTR_WH_PERIOD].sums_until(
+                begin, (begin + timedelta(hours=hours) for _, hours in windows)
+            ),
+            strict=True,
+        ):
+            values[key] = value
+
+        self._lookahead = (horizons, slot, values)
+        return values
+
+    def energy_forecast(
+        self, attribute: str = ATTR_WH_PERIOD
+    ) -> dict[str, dict[str, Any]]:
+        """Return the forecast for the energy dashboard from an energy series.
+
+        The payload is serialized once and reused for every request until the
+        next update.
+        """
+        if (forecast := self._energy_forecasts.get(attribute)) is None:
+            series = self._series[attribute]
+            forecast = {
+                "wh_hours": dict(
+                    zip(map(datetime.isoformat, series.keys), series.values)
+                )
+            }
+            self._energy_forecasts[attribute] = forecast
+        return forecast
+
+    def attributes_for_day(
+        self,
+        day: date,
+        mode: str = ATTRIBUTE_MODE_FULL,
+        max_points: int = DEFAULT_ATTRIBUTE_MAX_POINTS,
+    ) -> dict[str, dict[str, Any]]:
+        """Return the state attributes of a daily sensor for a local date.
+
+        In full mode, these are the watts, wh_period and wh_period_15m
+        series of the day; in hourly mode only wh_period. Downsampled, every
+        series is cut into at most max_points runs of consecutive values,
+        keyed by their first time, with energy summed and power averaged.
+        """
+        cache_key = (day, mode, max_points)
+        if (attributes := self._day_attributes.get(cache_key)) is not None:
+            return attributes
+
+        start = self._day_start(day)
+        end = start + timedelta(days=1)
+        names = (ATTR_WH_PERIOD,) if mode == ATTRIBUTE_MODE_HOURLY else self._series
+        attributes = {}
+        for attribute in names:
+            series = self._series[attribute]
+            keys = series.keys
+            values = series.values
+            span = series.span(start, end)
+            if mode != ATTRIBUTE_MODE_DOWNSAMPLED or len(span) <= max_points:
+                attributes[attribute] = {
+                    keys[index].isoformat(): values[index] for index in span
+                }
+                continue
+
+            step = -(-len(span) // max_points)
+            downsampled = {}
+            for first in range(span.start, span.stop, step):
+                run = values[first : min(first + step, span.stop)]
+                downsampled[keys[first].isoformat()] = (
+                    sum(run) / len(run) if attribute == ATTR_WATTS else sum(run)
+                )
+            attributes[attribute] = downsampled
+
+        self._day_attributes[cache_key] = attributes
+        return attributes
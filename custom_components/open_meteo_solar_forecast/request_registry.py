@@ -0,0 +1,133 @@
+"""Shared weather requests for the Open-Meteo Solar Forecast integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_REQUEST_REGISTRY, LOGGER
+
+# Config entries whose refreshes happen close together (e.g. right after a
+# restart) reuse a response this recent instead of requesting it again.
+SHARED_RESPONSE_MAX_AGE = timedelta(minutes=5)
+
+# Responses are kept this long so an entry with changed PV settings can
+# recompute its forecast without fetching the weather again. This covers
+# the slowest model cadence.
+CACHED_RESPONSE_MAX_AGE = timedelta(hours=24)
+
+# Responses no entry requests anymore are dropped after this delay, which
+# lets an entry that is being reloaded pick them up again.
+RELEASED_RESPONSE_MAX_AGE = timedelta(minutes=1)
+
+
+class ForecastRequestRegistry:
+    """Share identical upstream weather requests between config entries.
+
+    Requests are identified by a hashable key describing everything that is
+    sent to the API. Concurrent callers with the same key wait for a single
+    fetch, and its parsed response is handed to every one of them. The latest
+    response of every key a config entry currently requests is kept around
+    for recomputing forecasts locally; the responses of keys that no entry
+    requests anymore are dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the registry."""
+        self.hass = hass
+        self._in_flight: dict[Hashable, asyncio.Task[Any]] = {}
+        self._responses: dict[Hashable, tuple[datetime, Any]] = {}
+        self._keys_by_entry: dict[str, frozenset[Hashable]] = {}
+        self._unsub_release: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_set_keys(self, entry_id: str, keys: Iterable[Hashable]) -> None:
+        """Set the keys an entry requests, dropping responses no longer used."""
+        self._keys_by_entry[entry_id] = frozenset(keys)
+        self._async_drop_unused()
+
+    @callback
+    def async_release(self, entry_id: str) -> None:
+        """Release the keys of an unloaded entry.
+
+        Their responses are dropped shortly after, unless the entry (being
+        reloaded) or another one requests them again.
+        """
+        if self._keys_by_entry.pop(entry_id, None) is None:
+            return
+        if self._unsub_release is not None:
+            self._unsub_release()
+        self._unsub_release = async_call_later(
+            self.hass, RELEASED_RESPONSE_MAX_AGE, self._async_handle_release
+        )
+
+    @callback
+    def _async_handle_release(self, _now: datetime) -> None:
+        self._unsub_release = None
+        self._async_drop_unused()
+
+    @callback
+    def _async_drop_unused(self) -> None:
+        used = frozenset().union(*self._keys_by_entry.values())
+        for key in [key for key in self._responses if key not in used]:
+            LOGGER.debug("Dropping weather response no longer requested: %s", key)
+            del self._responses[key]
+
+    async def async_request(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the response for key, sharing the fetch with other callers."""
+        self._async_prune()
+        if (
+            cached := self._responses.get(key)
+        ) is not None and dt_util.utcnow() - cached[0] < SHARED_RESPONSE_MAX_AGE:
+            LOGGER.debug("Reusing shared weather response for %s", key)
+            return cached[1]
+
+        if (task := self._in_flight.get(key)) is None:
+            task = self.hass.async_create_task(self._async_fetch(key, fetch))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            LOGGER.debug("Joining in-flight weather request for %s", key)
+
+        # A caller timing out must not cancel the fetch for the other waiters.
+        return await asyncio.shield(task)
+
+    async def _async_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Perform the shared fetch and remember its response."""
+        response = await fetch()
+        if any(key in keys for keys in self._keys_by_entry.values()):
+            self._responses[key] = (dt_util.utcnow(), response)
+        return response
+
+    @callback
+    def async_get_cached(self, key: Hashable) -> tuple[datetime, Any] | None:
+        """Return the latest response for key and when it was fetched."""
+        self._async_prune()
+        return self._responses.get(key)
+
+    @callback
+    def _async_prune(self) -> None:
+        """Drop responses that are too old to be of any use."""
+        cutoff = dt_util.utcnow() - CACHED_RESPONSE_MAX_AGE
+        for key in [
+            key for key, (fetched, _) in self._responses.items() if fetched < cutoff
+        ]:
+            del self._responses[key]
+
+
+@callback
+def async_get_request_registry(hass: HomeAssistant) -> ForecastRequestRegistry:
+    """Return the request registry shared by all config entries."""
+    if (registry := hass.data.get(DATA_REQUEST_REGISTRY)) is None:
+        registry = hass.data[DATA_REQUEST_REGISTRY] = ForecastRequestRegistry(hass)
+    return registry
@@ -0,0 +1,207 @@
+"""Compact serialization of retained forecasts.
+
+Every series of an estimate is stored as its first key, the step between
+keys and the values as a zlib-compressed, base64-encoded little-endian
+array. Datetime keys are stored as epoch seconds and date keys as proleptic
+ordinals. Keys missing from the regular grid are stored as NaN, or as the
+smallest int64 in integer series. The series of every array of a
+multi-array estimate are stored the same way.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import zlib
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta, timezone
+from itertools import repeat
+from operator import floordiv, sub
+from typing import Any
+
+import numpy
+
+from .models import ArrayEstimate, IndexedEstimate
+
+FORMAT_VERSION = 2
+
+_DATETIME_SERIES = ("watts", "wh_period", "wh_period_15m")
+_DATE_SERIES = ("wh_days",)
+_ARRAY_DATETIME_SERIES = ("watts", "wh_period_15m")
+_ARRAY_DATE_SERIES = ("wh_days",)
+
+_DTYPES = {"i8": numpy.dtype("<i8"), "f8": numpy.dtype("<f8")}
+_INT_MISSING = numpy.iinfo(numpy.int64).min
+_UNITS = {"s": timedelta(seconds=1), "D": timedelta(days=1)}
+
+
+def _encode(array: numpy.ndarray) -> str:
+    return base64.b64encode(zlib.compress(array.tobytes(), 1)).decode("ascii")
+
+
+def _decode(data: str, dtype: numpy.dtype) -> numpy.ndarray:
+    return numpy.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=dtype)
+
+
+def _pack_series(keys: list[Any], values: list[Any], unit: str) -> dict[str, Any]:
+    """Pack a series keyed by ascending datetimes or dates into a regular grid.
+
+    The grid is in the given NumPy time unit ("s" or "D").
+    """
+    if not keys:
+        return {
+            "start": 0,
+            "step": 1,
+            "dtype": "i8",
+            "values": _encode(numpy.empty(0, dtype=_DTYPES["i8"])),
+        }
+
+    first = keys[0]
+    start = int(first.timestamp()) if unit == "s" else first.toordinal()
+    offsets = numpy.array(
+        list(map(floordiv, map(sub, keys, repeat(first)), repeat(_UNITS[unit]))),
+        dtype=numpy.int64,
+    )
+    step = int(numpy.gcd.reduce(offsets)) or 1
+
+    index = offsets // step
+    length = int(index[-1]) + 1
+    packed: dict[str, Any] = {"start": start, "step": step}
+
+    # Whole numbers are stored as integers, remembering which of them were
+    # floats (e.g. power clipped to the inverter), so they load unchanged.
+    is_float = [type(value) is float for value in values]
+    if all(
+        type(value) is int or (floating and value.is_integer())
+        for value, floating in zip(values, is_float, strict=True)
+    ):
+        array = numpy.full(length, _INT_MISSING, dtype=_DTYPES["i8"])
+        array[index] = values
+        packed["dtype"] = "i8"
+        if any(is_float):
+            floats = numpy.zeros(length, dtype=bool)
+            floats[index] = is_float
+            packed["floats"] = _encode(numpy.packbits(floats))
+    else:
+        array = numpy.full(length, numpy.nan, dtype=_DTYPES["f8"])
+        array[index] = values
+        packed["dtype"] = "f8"
+        # Integers among the floats are remembered the same way.
+        is_int = [type(value) is int for value in values]
+        if any(is_int):
+            ints = numpy.zeros(length, dtype=bool)
+            ints[index] = is_int
+            packed["ints"] = _encode(numpy.packbits(ints))
+
+    packed["values"] = _encode(array)
+    return packed
+
+
+def _unpack_series(
+    packed: Mapping[str, Any], unit: str
+) -> tuple[int, list[timedelta], list[Any]]:
+    """Unpack a series into its first key, key offsets and values.
+
+    The offsets are timedeltas in the given NumPy time unit ("s" or "D").
+    """
+    array = _decode(packed["values"], _DTYPES[packed["dtype"]])
+    if packed["dtype"] == "f8":
+        present = ~numpy.isnan(array)
+    else:
+        present = array != _INT_MISSING
+
+    index = numpy.flatnonzero(present)
+    values = array[index].tolist()
+    if "floats" in packed:
+        floats = numpy.unpackbits(_decode(packed["floats"], numpy.dtype("u1")))
+        for position in numpy.flatnonzero(floats[index]).tolist():
+            values[position] = float(values[position])
+    if "ints" in packed:
+        ints = numpy.unpackbits(_decode(packed["ints"], numpy.dtype("u1")))
+        for position in numpy.flatnonzero(ints[index]).tolist():
+            values[position] = int(values[position])
+
+    offsets = (index * int(packed["step"])).astype(f"timedelta64[{unit}]")
+    return int(packed["start"]), offsets.astype(object).tolist(), values
+
+
+def _pack_fields(
+    source: Any, datetime_names: tuple[str, ...], date_names: tuple[str, ...]
+) -> dict[str, Any]:
+    series = {}
+    for names, unit in ((datetime_names, "s"), (date_names, "D")):
+        for name in names:
+            data = getattr(source, name)
+            series[name] = _pack_series(list(data), list(data.values()), unit)
+    return series
+
+
+def _unpack_fields(
+    series: Mapping[str, Any],
+    api_timezone: timezone,
+    datetime_names: tuple[str, ...],
+    date_names: tuple[str, ...],
+) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    # Adding offsets to the first key is much faster than converting every
+    # key on its own, and exact since the timezone is fixed.
+    for name in datetime_names:
+        start, offsets, values = _unpack_series(series[name], "s")
+        first = datetime.fromtimestamp(start, api_timezone)
+        result[name] = dict(zip(map(first.__add__, offsets), values, strict=True))
+    for name in date_names:
+        start, offsets, values = _unpack_series(series[name], "D")
+        if not offsets:
+            result[name] = {}
+            continue
+        first = date.fromordinal(start)
+        result[name] = dict(zip(map(first.__add__, offsets), values, strict=True))
+    return result
+
+
+def pack_estimate(estimate: IndexedEstimate) -> dict[str, Any]:
+    """Return the compact representation of the series of an estimate."""
+    return {
+        "format": FORMAT_VERSION,
+        "api_timezone_offset": estimate.api_timezone.utcoffset(None).total_seconds(),
+        "series": _pack_fields(estimate, _DATETIME_SERIES, _DATE_SERIES),
+        "arrays": [
+            _pack_fields(array, _ARRAY_DATETIME_SERIES, _ARRAY_DATE_SERIES)
+            for array in estimate.arrays
+        ],
+    }
+
+
+def unpack_estimate(data: Mapping[str, Any]) -> IndexedEstimate:
+    """Rebuild an estimate from its compact representation.
+
+    Raises ValueError if the data is in an unknown format or corrupt.
+    """
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported retained forecast format {data.get('format')}")
+
+    api_timezone = timezone(timedelta(seconds=data["api_timezone_offset"]))
+    try:
+        result = _unpack_fields(
+            data["series"], api_timezone, _DATETIME_SERIES, _DATE_SERIES
+        )
+        arrays = [
+            ArrayEstimate(
+                **_unpack_fields(
+                    series, api_timezone, _ARRAY_DATETIME_SERIES, _ARRAY_DATE_SERIES
+                )
+            )
+            for series in data["arrays"]
+        ]
+    except zlib.error as err:
+        raise ValueError(f"Corrupt retained forecast data: {err}") from err
+
+    return IndexedEstimate(api_timezone=api_timezone, arrays=arrays, **result)
+
+
+def payload_digest(payload: Mapping[str, Any]) -> str:
+    """Return a digest of a retained forecast payload to detect changes."""
+    return hashlib.blake2b(
+        json.dumps(payload, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
@@ -0,0 +1,216 @@
+"""Refresh scheduling for the Open-Meteo Solar Forecast integration."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from astral import LocationInfo
+from astral.location import Location
+
+# Poll used for models without a known cadence; this was the fixed update
+# interval before refreshes followed the model runs.
+DEFAULT_UPDATE_INTERVAL = timedelta(minutes=30)
+
+# How soon to try again when the newest model run should be available but
+# has not shown up yet, or when the last fetch failed.
+RETRY_INTERVAL = timedelta(minutes=30)
+
+MIN_UPDATE_INTERVAL = timedelta(minutes=1)
+
+
+@dataclass(frozen=True, slots=True)
+class ModelCadence:
+    """Publication cadence of a weather model on Open-Meteo.
+
+    Runs are initialised every ``interval`` (aligned to 00 UTC) and are
+    available from the API roughly ``delay`` after their initialisation.
+    """
+
+    interval: timedelta
+    delay: timedelta
+
+
+def _cadence(interval_hours: int, delay_minutes: int) -> ModelCadence:
+    return ModelCadence(timedelta(hours=interval_hours), timedelta(minutes=delay_minutes))
+
+
+# Approximate cadences of the models offered by the forecast API. The
+# seamless/best_match blends pick up their fastest-updating member, so they
+# follow that member's cadence.
+MODEL_CADENCES: dict[str, ModelCadence] = {
+    "best_match": _cadence(1, 15),
+    "icon_seamless": _cadence(3, 120),
+    "icon_global": _cadence(6, 240),
+    "icon_eu": _cadence(3, 180),
+    "icon_d2": _cadence(3, 120),
+    "gfs_seamless": _cadence(1, 60),
+    "gfs_global": _cadence(6, 300),
+    "gfs_hrrr": _cadence(1, 60),
+    "ncep_nbm_conus": _cadence(1, 120),
+    "ecmwf_ifs04": _cadence(6, 420),
+    "ecmwf_ifs025": _cadence(6, 420),
+    "ecmwf_aifs025_single": _cadence(6, 420),
+    "meteofrance_seamless": _cadence(1, 120),
+    "meteofrance_arpege_world": _cadence(6, 240),
+    "meteofrance_arpege_europe": _cadence(6, 240),
+    "meteofrance_arome_france": _cadence(3, 180),
+    "meteofrance_arome_france_hd": _cadence(1, 120),
+    "jma_seamless": _cadence(3, 120),
+    "jma_msm": _cadence(3, 120),
+    "jma_gsm": _cadence(6, 240),
+    "metno_seamless": _cadence(1, 60),
+    "metno_nordic": _cadence(1, 60),
+    "gem_seamless": _cadence(6, 240),
+    "gem_global": _cadence(12, 300),
+    "gem_regional": _cadence(6, 240),
+    "gem_hrdps_continental": _cadence(6, 240),
+    "knmi_seamless": _cadence(1, 60),
+    "knmi_harmonie_arome_europe": _cadence(1, 60),
+    "knmi_harmonie_arome_netherlands": _cadence(1, 60),
+    "dmi_seamless": _cadence(3, 180),
+    "dmi_harmonie_arome_europe": _cadence(3, 180),
+    "ukmo_seamless": _cadence(1, 60),
+    "ukmo_global_deterministic_10km": _cadence(6, 300),
+    "ukmo_uk_deterministic_2km": _cadence(1, 120),
+    "cma_grapes_global": _cadence(6, 480),
+    "bom_access_global": _cadence(6, 480),
+}
+
+DEFAULT_CADENCE = ModelCadence(DEFAULT_UPDATE_INTERVAL, timedelta(0))
+
+
+class ModelRunSchedule:
+    """Work out when a weather model publishes its next run."""
+
+    def __init__(self, model: str | None) -> None:
+        """Initialize the schedule for a weather model."""
+        self.cadence = MODEL_CADENCES.get(model or "best_match", DEFAULT_CADENCE)
+
+    def run_available_since(self, now: datetime) -> datetime:
+        """Return when the newest run that should be out at now became available."""
+        interval = self.cadence.interval.total_seconds()
+        delay = self.cadence.delay.total_seconds()
+        run_start = (now.timestamp() - delay) // interval * interval
+        return datetime.fromtimestamp(run_start + delay, timezone.utc)
+
+    def next_run_available(self, now: datetime) -> datetime:
+        """Return when the run after the current one should become available."""
+        return self.run_available_since(now) + self.cadence.interval
+
+    def is_current(self, fetched_at: datetime, now: datetime) -> bool:
+        """Return whether data fetched at fetched_at still is the newest run."""
+        return fetched_at >= self.run_available_since(now)
+
+    def next_refresh(self, now: datetime, run_seen_at: datetime | None) -> datetime:
+        """Return when the forecast should be fetched again.
+
+        run_seen_at is when the forecast currently served was first seen. If
+        it predates the newest run that should be out, that run is late (or
+        the fetch failed) and it is polled for again sooner.
+        """
+        next_run = self.next_run_available(now)
+        if run_seen_at is None or not self.is_current(run_seen_at, now):
+            return min(now + RETRY_INTERVAL, next_run)
+        return next_run
+
+
+# With adaptive refresh, the forecast is not fetched between dusk and this
+# long before sunrise, so the day starts with a fresh forecast.
+PRE_DAWN_LEAD = timedelta(hours=1)
+
+# Refreshes are deferred at most this long at night, so a long polar night
+# does not stop them for weeks.
+MAX_NIGHT_DEFERRAL = timedelta(days=1)
+
+# Days around now searched for the next sunrise and sunset. Beyond them the
+# sun is taken to neither rise nor set (polar day or night).
+_SUN_EVENT_DAYS = (-1, 0, 1, 2)
+
+# Window ahead of now over which successive forecasts are compared.
+VOLATILITY_WINDOW = timedelta(hours=6)
+
+# Daylight refresh intervals by forecast volatility: the mean change of the
+# upcoming power curve between two fetches, relative to its peak.
+VOLATILITY_INTERVALS: tuple[tuple[float, timedelta], ...] = (
+    (0.15, timedelta(minutes=15)),
+    (0.05, timedelta(minutes=30)),
+)
+
+
+def forecast_volatility(
+    previous: Mapping[datetime, float],
+    current: Mapping[datetime, float],
+    now: datetime,
+) -> float | None:
+    """Return how much the upcoming power curve moved between two forecasts.
+
+    This is the mean absolute difference over the volatility window relative
+    to the peak power in it, or None if there is nothing to compare.
+    """
+    end = now + VOLATILITY_WINDOW
+    differences = []
+    peak = 0.0
+    for timestamp, watts in current.items():
+        if not now <= timestamp < end or timestamp not in previous:
+            continue
+        differences.append(abs(watts - previous[timestamp]))
+        peak = max(peak, watts, previous[timestamp])
+
+    if not differences or peak <= 0:
+        return None
+    return sum(differences) / len(differences) / peak
+
+
+class AdaptiveRefresh:
+    """Adapt refresh timing to daylight at the configured location.
+
+    Between dusk and shortly before dawn nothing relevant to PV production
+    changes, so refreshes are deferred until the pre-dawn fetch (for a day
+    at most). During daylight, refreshes are brought forward while the
+    forecast keeps changing a lot between fetches (e.g. with fast-moving
+    clouds).
+    """
+
+    def __init__(self, latitude: float, longitude: float) -> None:
+        """Initialize adaptive refresh for a location."""
+        self._location = Location(LocationInfo("", "", "UTC", latitude, longitude))
+
+    def _next_event(self, event: str, now: datetime) -> datetime | None:
+        """Return the next sunrise or sunset within a few days, if any."""
+        for days in _SUN_EVENT_DAYS:
+            try:
+                moment = getattr(self._location, event)(
+                    now.date() + timedelta(days=days), local=False
+                )
+            except ValueError:
+                # The sun does not rise or set on that day.
+                continue
+            if moment > now:
+                return moment
+        return None
+
+    def next_refresh(
+        self, now: datetime, scheduled: datetime, volatility: float | None
+    ) -> datetime:
+        """Return the refresh time adjusted for daylight and volatility."""
+        next_sunrise = self._next_event("sunrise", now)
+        next_sunset = self._next_event("sunset", now)
+        if next_sunrise is None and next_sunset is None:
+            # Polar day or night: there is no dusk/dawn to adapt to.
+            return scheduled
+
+        if next_sunset is None or (
+            next_sunrise is not None and next_sunrise < next_sunset
+        ):
+            # Night: wait for the pre-dawn refresh, or a day at most.
+            night_end = min(next_sunrise - PRE_DAWN_LEAD, now + MAX_NIGHT_DEFERRAL)
+            return max(scheduled, night_end)
+
+        if volatility is not None:
+            for threshold, interval in VOLATILITY_INTERVALS:
+                if volatility >= threshold:
+                    return min(scheduled, now + interval)
+
+        return scheduled
@@ -5,6 +5,7 @@ from __future__ import annotations
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from time import perf_counter
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -17,26 +18,39 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy, UnitOfPower
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_utc_time_change
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import slugify
 
-from open_meteo_solar_forecast.models import Estimate
-
-from .const import ATTR_WATTS, ATTR_WH_PERIOD, ATTR_WH_PERIOD_15M, DOMAIN
+from .const import ATTRIBUTE_MODE_NONE, DOMAIN
 from .coordinator import OpenMeteoSolarForecastDataUpdateCoordinator
+from .lookahead import (
+    BUILTIN_ENERGY_WINDOWS,
+    BUILTIN_POWER_OFFSETS,
+    LookaheadHorizons,
+    format_duration,
+)
+from .metrics import Metrics
+from .models import IndexedEstimate
+from .ticks import UpdatePeriod
 
 
 @dataclass(frozen=True)
 class OpenMeteoSolarForecastSensorEntityDescription(SensorEntityDescription):
     """Describes a Solar Forecast Sensor."""
 
-    state: Callable[[Estimate], Any] | None = None
+    state: Callable[[IndexedEstimate], Any] | None = None
+    # When the value can change as time passes, between forecast updates.
+    update_period: UpdatePeriod = UpdatePeriod.SLOT
+    # Whether the value is one of the look-ahead horizons of the coordinator,
+    # which are all evaluated together.
+    lookahead: bool = False
+    # For diagnostic sensors, the value from the metrics of the coordinator.
+    metric: Callable[[Metrics], Any] | None = None
 
 
 SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
@@ -48,6 +62,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_today_remaining",
@@ -66,6 +81,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d2",
@@ -77,6 +93,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d3",
@@ -88,6 +105,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d4",
@@ -99,6 +117,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d5",
@@ -110,6 +129,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d6",
@@ -121,6 +141,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_production_d7",
@@ -132,16 +153,173 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_highest_peak_time_today",
         translation_key="power_highest_peak_time_today",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date()
+        ).peak_time,
         device_class=SensorDeviceClass.TIMESTAMP,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_highest_peak_time_tomorrow",
         translation_key="power_highest_peak_time_tomorrow",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=1)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d2",
+        translation_key="power_highest_peak_time_d2",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=2)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d3",
+        translation_key="power_highest_peak_time_d3",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=3)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d4",
+        translation_key="power_highest_peak_time_d4",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=4)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d5",
+        translation_key="power_highest_peak_time_d5",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=5)
+        ).peak_time,
         device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d6",
+        translation_key="power_highest_peak_time_d6",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=6)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_time_d7",
+        translation_key="power_highest_peak_time_d7",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=7)
+        ).peak_time,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_today",
+        translation_key="power_highest_peak_today",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date()
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_tomorrow",
+        translation_key="power_highest_peak_tomorrow",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=1)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d2",
+        translation_key="power_highest_peak_d2",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=2)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d3",
+        translation_key="power_highest_peak_d3",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=3)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d4",
+        translation_key="power_highest_peak_d4",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=4)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d5",
+        translation_key="power_highest_peak_d5",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=5)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d6",
+        translation_key="power_highest_peak_d6",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=6)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="power_highest_peak_d7",
+        translation_key="power_highest_peak_d7",
+        state=lambda estimate: estimate.day_summary(
+            estimate.now().date() + timedelta(days=7)
+        ).peak_watts,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_registry_enabled_default=False,
+        update_period=UpdatePeriod.DAY,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_now",
@@ -154,9 +332,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_next_15minutes",
         translation_key="power_production_next_15minutes",
-        state=lambda estimate: estimate.power_production_at_time(
-            estimate.now() + timedelta(minutes=15)
-        ),
+        lookahead=True,
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -164,9 +340,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_next_30minutes",
         translation_key="power_production_next_30minutes",
-        state=lambda estimate: estimate.power_production_at_time(
-            estimate.now() + timedelta(minutes=30)
-        ),
+        lookahead=True,
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -174,9 +348,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_next_hour",
         translation_key="power_production_next_hour",
-        state=lambda estimate: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=1)
-        ),
+        lookahead=True,
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -184,9 +356,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_next_12hours",
         translation_key="power_production_next_12hours",
-        state=lambda estimate: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=12)
-        ),
+        lookahead=True,
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -194,9 +364,7 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
     OpenMeteoSolarForecastSensorEntityDescription(
         key="power_production_next_24hours",
         translation_key="power_production_next_24hours",
-        state=lambda estimate: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=24)
-        ),
+        lookahead=True,
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -209,15 +377,58 @@ SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.HOUR,
     ),
     OpenMeteoSolarForecastSensorEntityDescription(
         key="energy_next_hour",
         translation_key="energy_next_hour",
-        state=lambda estimate: estimate.sum_energy_production(1),
+        lookahead=True,
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
+        update_period=UpdatePeriod.HOUR,
+    ),
+)
+
+
+DIAGNOSTIC_SENSORS: tuple[OpenMeteoSolarForecastSensorEntityDescription, ...] = (
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="http_latency",
+        translation_key="http_latency",
+        metric=lambda metrics: metrics.http_latency.percentile(0.95),
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="compute_time",
+        translation_key="compute_time",
+        metric=lambda metrics: metrics.compute_time.percentile(0.95),
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="callback_time_last_hour",
+        translation_key="callback_time_last_hour",
+        metric=lambda metrics: metrics.callback_seconds_last_hour(),
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+    ),
+    OpenMeteoSolarForecastSensorEntityDescription(
+        key="state_writes_last_hour",
+        translation_key="state_writes_last_hour",
+        metric=lambda metrics: sum(metrics.state_writes_last_hour().values()),
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
     ),
 )
 
@@ -230,16 +441,115 @@ async def async_setup_entry(
         entry.entry_id
     ]
 
+    descriptions = (
+        *SENSORS,
+        *_lookahead_sensors(coordinator.horizons),
+        *_array_sensors(coordinator.array_count),
+        *DIAGNOSTIC_SENSORS,
+    )
     async_add_entities(
         OpenMeteoSolarForecastSensorEntity(
             entry_id=entry.entry_id,
             coordinator=coordinator,
             entity_description=entity_description,
         )
-        for entity_description in SENSORS
+        for entity_description in descriptions
     )
 
 
+def _lookahead_sensors(
+    horizons: LookaheadHorizons,
+) -> list[OpenMeteoSolarForecastSensorEntityDescription]:
+    """Describe the look-ahead sensors configured in addition to SENSORS."""
+    descriptions = [
+        OpenMeteoSolarForecastSensorEntityDescription(
+            key=key,
+            translation_key="power_production_lookahead",
+            translation_placeholders={"duration": format_duration(offset)},
+            lookahead=True,
+            device_class=SensorDeviceClass.POWER,
+            native_unit_of_measurement=UnitOfPower.WATT,
+        )
+        for key, offset in horizons.power_offsets.items()
+        if key not in BUILTIN_POWER_OFFSETS
+    ]
+    descriptions.extend(
+        OpenMeteoSolarForecastSensorEntityDescription(
+            key=key,
+            translation_key="energy_lookahead",
+            translation_placeholders={"duration": f"{hours}h"},
+            lookahead=True,
+            device_class=SensorDeviceClass.ENERGY,
+            native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+            suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            suggested_display_precision=1,
+            update_period=UpdatePeriod.HOUR,
+        )
+        for key, hours in horizons.energy_windows.items()
+        if key not in BUILTIN_ENERGY_WINDOWS
+    )
+    return descriptions
+
+
+def _array_sensors(
+    array_count: int,
+) -> list[OpenMeteoSolarForecastSensorEntityDescription]:
+    """Describe the sensors of the individual arrays of a multi-array entry."""
+    if array_count < 2:
+        return []
+
+    descriptions = []
+    for index in range(array_count):
+        placeholders = {"array_number": str(index + 1)}
+        descriptions.extend(
+            (
+                OpenMeteoSolarForecastSensorEntityDescription(
+                    key=f"array_{index + 1}_power_production_now",
+                    translation_key="array_power_production_now",
+                    translation_placeholders=placeholders,
+                    state=lambda estimate, index=index: (
+                        estimate.array_power_production_now(index)
+                    ),
+                    device_class=SensorDeviceClass.POWER,
+                    state_class=SensorStateClass.MEASUREMENT,
+                    entity_registry_enabled_default=False,
+                    native_unit_of_measurement=UnitOfPower.WATT,
+                ),
+                OpenMeteoSolarForecastSensorEntityDescription(
+                    key=f"array_{index + 1}_energy_production_today",
+                    translation_key="array_energy_production_today",
+                    translation_placeholders=placeholders,
+                    state=lambda estimate, index=index: (
+                        estimate.array_day_production(index, estimate.now().date())
+                    ),
+                    device_class=SensorDeviceClass.ENERGY,
+                    entity_registry_enabled_default=False,
+                    native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+                    suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                    suggested_display_precision=1,
+                    update_period=UpdatePeriod.DAY,
+                ),
+                OpenMeteoSolarForecastSensorEntityDescription(
+                    key=f"array_{index + 1}_energy_production_tomorrow",
+                    translation_key="array_energy_production_tomorrow",
+                    translation_placeholders=placeholders,
+                    state=lambda estimate, index=index: (
+                        estimate.array_day_production(
+                            index, estimate.now().date() + timedelta(days=1)
+                        )
+                    ),
+                    device_class=SensorDeviceClass.ENERGY,
+                    entity_registry_enabled_default=False,
+                    native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+                    suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                    suggested_display_precision=1,
+                    update_period=UpdatePeriod.DAY,
+                ),
+            )
+        )
+    return descriptions
+
+
 class OpenMeteoSolarForecastSensorEntity(
     CoordinatorEntity[OpenMeteoSolarForecastDataUpdateCoordinator], SensorEntity
 ):
@@ -247,6 +557,8 @@ class OpenMeteoSolarForecastSensorEntity(
 
     entity_description: OpenMeteoSolarForecastSensorEntityDescription
     _attr_has_entity_name = True
+    # Availability, value and attributes of the last written state.
+    _written_state: tuple[bool, tuple[type, Any], Any] | None = None
 
     def __init__(
         self,
@@ -270,34 +582,77 @@ class OpenMeteoSolarForecastSensorEntity(
             configuration_url="https://open-meteo.com",
         )
 
-    async def _update_callback(self, now: datetime) -> None:
+    @callback
+    def _handle_tick(self) -> None:
         """Update the entity without fetching data from server.
 
-        This is required for the power_production_* sensors to update
-        as they take data in 15-minute intervals and the update interval
-        is 30 minutes."""
-        if not self.enabled:
+        This is required for sensors that depend on the current time (e.g.
+        power_production_now), as the forecast is only refreshed when a new
+        model run is published."""
+        self._async_write_state_if_changed()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._async_write_state_if_changed()
+
+    @callback
+    def _async_write_state_if_changed(self) -> None:
+        """Write the state if it changed, recording the time this took."""
+        start = perf_counter()
+        try:
+            self._async_write_changed_state()
+        finally:
+            self.coordinator.metrics.record_callback(perf_counter() - start)
+
+    @callback
+    def _async_write_changed_state(self) -> None:
+        """Write the state only if the value, attributes or availability changed.
+
+        Attributes are prepared once per forecast (see IndexedEstimate), so
+        comparing them by identity tells whether they changed.
+        """
+        available = self.available
+        value = self.native_value if available else None
+        # The type is compared too, as e.g. 0 and 0.0 are written differently.
+        state = (
+            available,
+            (type(value), value),
+            self.extra_state_attributes if available else None,
+        )
+        written = self._written_state
+        if (
+            written is not None
+            and written[:2] == state[:2]
+            and written[2] is state[2]
+        ):
             return
 
+        self._written_state = state
         self.async_write_ha_state()
+        self.coordinator.metrics.record_state_write(self.entity_description.key)
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
         await super().async_added_to_hass()
 
-        # Update the state of the sensor every minute without
-        # fetching new data from the server.
+        # Update the state of the sensor whenever its value can change,
+        # without fetching new data from the server.
         self.async_on_remove(
-            async_track_utc_time_change(
-                self.hass,
-                self._update_callback,
-                second=0,
+            self.coordinator.ticks.async_add_listener(
+                self.entity_description.update_period, self._handle_tick
             )
         )
 
     @property
     def native_value(self) -> datetime | StateType:
         """Return the state of the sensor."""
+        if self.entity_description.metric is not None:
+            return self.entity_description.metric(self.coordinator.metrics)
+        if self.entity_description.lookahead:
+            return self.coordinator.data.lookahead(self.coordinator.horizons)[
+                self.entity_description.key
+            ]
         if self.entity_description.state is None:
             state: StateType | datetime = getattr(
                 self.coordinator.data, self.entity_description.key
@@ -330,22 +685,12 @@ class OpenMeteoSolarForecastSensorEntity(
                     f"Unexpected key {self.entity_description.key} for extra_state_attributes"
                 )
 
-            return {
-                ATTR_WATTS: {
-                    watt_datetime.isoformat(): watt_value
-                    for watt_datetime, watt_value in self.coordinator.data.watts.items()
-                    if watt_datetime.date() == target_date
-                },
-                ATTR_WH_PERIOD: {
-                    wh_datetime.isoformat(): wh_value
-                    for wh_datetime, wh_value in self.coordinator.data.wh_period.items()
-                    if wh_datetime.date() == target_date
-                },
-                ATTR_WH_PERIOD_15M: {
-                    wh_datetime.isoformat(): wh_value
-                    for wh_datetime, wh_value in self.coordinator.data.wh_period_15m.items()
-                    if wh_datetime.date() == target_date
-                },
-            }
+            if self.coordinator.attribute_mode == ATTRIBUTE_MODE_NONE:
+                return None
+            return self.coordinator.data.attributes_for_day(
+                target_date,
+                self.coordinator.attribute_mode,
+                self.coordinator.attribute_max_points,
+            )
 
         return None
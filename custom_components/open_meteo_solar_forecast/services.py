@@ -0,0 +1,191 @@
+"""Services of the Open-Meteo Solar Forecast integration."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, time, timedelta
+from statistics import fmean
+from typing import Any
+
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import ATTR_WATTS, ATTR_WH_PERIOD_15M, DOMAIN, FORECAST_SLOT
+from .coordinator import OpenMeteoSolarForecastDataUpdateCoordinator
+from .models import IndexedEstimate
+
+SERVICE_GET_FORECAST = "get_forecast"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_RESOLUTION = "resolution"
+ATTR_ARRAY = "array"
+ATTR_AGGREGATION = "aggregation"
+
+RESOLUTIONS = ("15m", "1h", "1d")
+AGGREGATIONS: dict[str, Callable[[list[Any]], Any]] = {
+    "mean": fmean,
+    "max": max,
+    "min": min,
+}
+
+GET_FORECAST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_RESOLUTION, default="1h"): vol.In(RESOLUTIONS),
+        vol.Optional(ATTR_ARRAY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_AGGREGATION, default="mean"): vol.In(AGGREGATIONS),
+    }
+)
+
+
+def interval_start(
+    estimate: IndexedEstimate, moment: datetime, resolution: str
+) -> datetime:
+    """Return the start of the interval containing a time.
+
+    Intervals are aligned in the timezone of the forecast.
+    """
+    local = moment.astimezone(estimate.api_timezone)
+    if resolution == "1d":
+        return datetime.combine(local.date(), time(), estimate.api_timezone)
+    if resolution == "1h":
+        return local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(
+        minute=local.minute - local.minute % 15, second=0, microsecond=0
+    )
+
+
+def _interval_end(
+    estimate: IndexedEstimate, start: datetime, resolution: str
+) -> datetime:
+    if resolution == "1d":
+        return datetime.combine(
+            start.date() + timedelta(days=1), time(), estimate.api_timezone
+        )
+    if resolution == "1h":
+        return start + timedelta(hours=1)
+    return start + FORECAST_SLOT
+
+
+def forecast_intervals(
+    estimate: IndexedEstimate,
+    start: datetime,
+    end: datetime | None,
+    resolution: str,
+    array: int | None = None,
+    aggregation: str = "mean",
+) -> list[dict[str, Any]]:
+    """Return the forecast between start and end at a resolution.
+
+    Every interval has the energy produced in it (the sum of its 15-minute
+    energies, in Wh) and its power (the aggregation of the power values in
+    it, in W). The first and last interval only cover the part within
+    [start, end); intervals without forecast data are left out. With
+    array, the forecast of that array (numbered from 1, like in the
+    service) is returned instead of the combined one.
+    """
+    index = None if array is None else array - 1
+    watts = estimate.series(ATTR_WATTS, index)
+    energy = estimate.series(ATTR_WH_PERIOD_15M, index)
+    aggregate = AGGREGATIONS[aggregation]
+    if not watts.keys:
+        return []
+
+    # Intervals outside the forecast have no data, so only walk those in it.
+    start = max(start, watts.keys[0])
+    last = watts.keys[-1] + FORECAST_SLOT
+    if end is not None:
+        last = min(last, end)
+    if start >= last:
+        return []
+
+    intervals = []
+    current = interval_start(estimate, start, resolution)
+    while current < last:
+        following = _interval_end(estimate, current, resolution)
+        begin = max(current, start)
+        until = min(following, last)
+        if power := [watts.values[index] for index in watts.span(begin, until)]:
+            intervals.append(
+                {
+                    "start": current.isoformat(),
+                    "end": following.isoformat(),
+                    "energy": energy.sum(begin, until),
+                    "power": aggregate(power),
+                }
+            )
+        current = following
+    return intervals
+
+
+def _as_aware(value: datetime) -> datetime:
+    """Treat times without a timezone as local time."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_get_forecast(call: ServiceCall) -> ServiceResponse:
+        """Return the forecast of a config entry from memory."""
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        coordinator: OpenMeteoSolarForecastDataUpdateCoordinator | None = (
+            hass.data.get(DOMAIN, {}).get(entry_id)
+        )
+        if coordinator is None or coordinator.data is None:
+            raise ServiceValidationError(f"No forecast loaded for entry {entry_id}")
+
+        estimate = coordinator.data
+        resolution = call.data[ATTR_RESOLUTION]
+        if (array := call.data.get(ATTR_ARRAY)) is not None:
+            if array > coordinator.array_count:
+                raise ServiceValidationError(
+                    f"Array {array} does not exist, the entry has "
+                    f"{coordinator.array_count} array(s)"
+                )
+            # The forecast of a single array is the combined forecast.
+            if not estimate.arrays:
+                array = None
+
+        # By default, from the start of the current interval on.
+        if ATTR_START in call.data:
+            start = _as_aware(call.data[ATTR_START])
+        else:
+            start = interval_start(estimate, estimate.now(), resolution)
+        end = _as_aware(call.data[ATTR_END]) if ATTR_END in call.data else None
+        if end is not None and end <= start:
+            raise ServiceValidationError("The end has to be after the start")
+
+        return {
+            "resolution": resolution,
+            "forecast": forecast_intervals(
+                estimate,
+                start,
+                end,
+                resolution,
+                array,
+                call.data[ATTR_AGGREGATION],
+            ),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        async_get_forecast,
+        schema=GET_FORECAST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,161 @@
+"""Import of the forecast into long-term statistics."""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, time
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistics_during_period,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import ATTR_WH_PERIOD_15M, DOMAIN, LOGGER
+from .models import IndexedEstimate, TimeSeries
+
+HOUR_SECONDS = 3600
+
+
+def hourly_energy(series: TimeSeries, first_hour: int) -> dict[int, float]:
+    """Return the energy of a 15-minute energy series per UTC hour.
+
+    The keys are the epoch seconds of the start of every hour from
+    first_hour on, as the statistics are kept in UTC hours. In timezones
+    with a whole-hour offset these are the same values as the wh_period
+    series.
+    """
+    hours: dict[int, float] = {}
+    start = bisect_left(series.epochs, first_hour)
+    for epoch, energy in zip(
+        series.epochs[start:], series.values[start:], strict=True
+    ):
+        hour = epoch - epoch % HOUR_SECONDS
+        hours[hour] = hours.get(hour, 0) + energy
+    return hours
+
+
+class ForecastStatistics:
+    """Import the hourly energy forecast of an entry as external statistics.
+
+    There is a statistic for the combined forecast and, for multi-array
+    entries, one per array. Only the forecast from the start of today on is
+    imported, not the past days the weather data also covers. Every import
+    writes all hours from the first one whose forecast changed in one batch;
+    as the sum of a statistic accumulates over the hours, the hours before
+    it are left as they are.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, title: str) -> None:
+        """Initialize the importer of a config entry."""
+        self.hass = hass
+        self._object_id = f"energy_forecast_{entry_id.lower()}"
+        self._title = title
+        self._lock = asyncio.Lock()
+        # The last imported (state, sum) of every hour, by statistic ID.
+        self._imported: dict[str, dict[int, tuple[float, float]]] = {}
+
+    def statistic_id(self, array: int | None = None) -> str:
+        """Return the statistic ID of the forecast, or of an array."""
+        if array is None:
+            return f"{DOMAIN}:{self._object_id}"
+        return f"{DOMAIN}:{self._object_id}_array_{array + 1}"
+
+    async def async_import(self, estimate: IndexedEstimate) -> None:
+        """Import the hours of an estimate that changed since the last import."""
+        today = datetime.combine(estimate.now().date(), time(), estimate.api_timezone)
+        first_hour = int(today.timestamp())
+        async with self._lock:
+            arrays: list[int | None] = [None, *range(len(estimate.arrays))]
+            for array in arrays:
+                name = f"{self._title} energy forecast"
+                if array is not None:
+                    name = f"{self._title} array {array + 1} energy forecast"
+                await self._async_import_series(
+                    self.statistic_id(array),
+                    name,
+                    hourly_energy(
+                        estimate.series(ATTR_WH_PERIOD_15M, array), first_hour
+                    ),
+                )
+
+    async def _async_load_imported(
+        self, statistic_id: str, first_hour: int
+    ) -> dict[int, tuple[float, float]]:
+        """Load the hours imported before, from the hour before first_hour on."""
+        start = dt_util.utc_from_timestamp(first_hour - HOUR_SECONDS)
+        rows = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            start,
+            None,
+            {statistic_id},
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        return {
+            int(row["start"]): (row.get("state") or 0, row.get("sum") or 0)
+            for row in rows.get(statistic_id, [])
+        }
+
+    async def _async_import_series(
+        self, statistic_id: str, name: str, hours: dict[int, float]
+    ) -> None:
+        if not hours:
+            return
+
+        first_hour = min(hours)
+        if (imported := self._imported.get(statistic_id)) is None:
+            imported = await self._async_load_imported(statistic_id, first_hour)
+            self._imported[statistic_id] = imported
+
+        # Hours up to the first changed one keep their state and sum.
+        changed = sorted(
+            hour
+            for hour, energy in hours.items()
+            if hour not in imported or imported[hour][0] != energy
+        )
+        if not changed:
+            return
+
+        previous = imported.get(changed[0] - HOUR_SECONDS)
+        total = previous[1] if previous is not None else 0
+        statistics: list[StatisticData] = []
+        for hour in sorted(hour for hour in hours if hour >= changed[0]):
+            total += hours[hour]
+            imported[hour] = (hours[hour], total)
+            statistics.append(
+                StatisticData(
+                    start=dt_util.utc_from_timestamp(hour),
+                    state=hours[hour],
+                    sum=total,
+                )
+            )
+
+        # Hours that are no longer needed to continue the sum.
+        for hour in [hour for hour in imported if hour < first_hour - HOUR_SECONDS]:
+            del imported[hour]
+
+        LOGGER.debug(
+            "Importing %s hours of forecast statistics for %s",
+            len(statistics),
+            statistic_id,
+        )
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+            ),
+            statistics,
+        )
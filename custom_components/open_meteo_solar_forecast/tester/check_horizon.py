@@ -5,60 +5,12 @@ Created on Sun Feb  8 12:36:59 2026
 @author: thoma
 """
 
-import numpy
+import os
+import sys
 
-def checkHorizonFile(horizon_filepath):
-    horizon_data_valid = True
-    message = ""
-    
-    try:
-        open(horizon_filepath)
-    except FileNotFoundError:
-        horizon_data_valid = False
-        message = "Invalid horizon file: Horizon file '" + horizon_filepath + "' not found! Specify path like e.g. '/config/www/horizon.txt'"
-    
-    if horizon_data_valid:
-        horizon_data = numpy.genfromtxt(horizon_filepath , delimiter="\t", dtype=float)
-        hm = ((0,90),(360,90))
-        
-        # ... check array shape (error)
-        sh = horizon_data.shape
-        if isinstance(sh, tuple) and len(sh) == 2:
-            if sh[0] < 2 or not sh[1] == 2:
-                horizon_data_valid = False
-                message = "Invalid horizon file: The array shape is " + str(sh) + ", which is invalid. It has to be at least two rows and exactly two columns (N>1 , 2). Please check (two columns, tab delimiter, decimal points)."
-            else:
-                hm = tuple([tuple(row) for row in horizon_data])
-        else:
-            horizon_data_valid = False
-            message = "Invalid horizon file: The array shape cannot be determined. It has to be at least two rows and exactly two columns (N>1 , 2). Please check (two columns, tab delimiter, decimal points)."
-        
-        # ... check for floats (error) - via valid sum of floats or NaN
-        if numpy.isnan(numpy.sum(hm)):
-            horizon_data_valid = False
-            message = "Invalid horizon file: The data seems to contain non-float values. Please check (two columns, tab delimiter, decimal points)."
-        
-        # ... check range 0...360° (warning only)
-        if horizon_data_valid:
-            hm_0 = int(hm[0][0])
-            hm_n = int(hm[-1][0])
-            if not hm_0 == 0 or not hm_n == 360:
-                horizon_data_valid = False
-                message = "Invalid horizon file: Azimuth values (" + str(hm_0) + "° to " + str(hm_n) + "°) do not contain 0° and/or 360°. I cannot judge whether the full range of applicable azimuths is covered by the horizon file. Please check..."
-            
-            # ... check ascending azimuths (warning only)
-            n = sh[0]
-            for i in range(1,n):
-                a1 = horizon_data[i-1][0]
-                a2 = horizon_data[i][0]
-                if not (a2 > a1):
-                    message = "Invalid horizon file: Azimuth values are not ascending around value of " + str(a1) + ". Please check..."
-                    horizon_data_valid = False
-    
-    if horizon_data_valid:
-        return hm, message
-    else:
-        return None, message   
+# Use the loader of the integration, which only depends on NumPy.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from horizon import load_horizon_file  # noqa: E402
 
 # Read horizon data from text file and check for validity
 
@@ -70,6 +22,6 @@ horizon_filepath = "horizon_does_not_exist.txt"
 #horizon_filepath = "horizon_endpoints.txt"
 #horizon_filepath = "horizon_unsorted.txt"
 
-hm, message = checkHorizonFile(horizon_filepath)
+hm, message = load_horizon_file(horizon_filepath)
 print(hm)
-print(message)
\ No newline at end of file
+print(message)
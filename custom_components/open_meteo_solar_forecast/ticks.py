@@ -0,0 +1,127 @@
+"""Shared clock for sensors whose value changes with the time of day."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, time, timedelta, tzinfo
+from enum import StrEnum
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import FORECAST_SLOT, LOGGER
+
+# Values that depend on the current time can only change at the boundaries
+# of the forecast slots.
+SLOT_MINUTES = FORECAST_SLOT // timedelta(minutes=1)
+
+
+class UpdatePeriod(StrEnum):
+    """Boundaries at which a value derived from the forecast can change.
+
+    Listed from the shortest period to the longest.
+    """
+
+    SLOT = "slot"
+    HOUR = "hour"
+    DAY = "day"
+
+
+def next_slot_start(now: datetime, timezone: tzinfo) -> datetime:
+    """Return the start of the next forecast slot after now, in timezone."""
+    local = now.astimezone(timezone).replace(second=0, microsecond=0)
+    return local - timedelta(minutes=local.minute % SLOT_MINUTES) + FORECAST_SLOT
+
+
+def next_boundary(now: datetime, timezone: tzinfo, period: UpdatePeriod) -> datetime:
+    """Return the end of the period running at now, in timezone."""
+    if period is UpdatePeriod.SLOT:
+        return next_slot_start(now, timezone)
+    local = now.astimezone(timezone)
+    if period is UpdatePeriod.HOUR:
+        return local.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return datetime.combine(local.date() + timedelta(days=1), time(), timezone)
+
+
+def due_periods(boundary: datetime) -> tuple[UpdatePeriod, ...]:
+    """Return the update periods that end at a (local) slot boundary."""
+    if boundary.minute:
+        return (UpdatePeriod.SLOT,)
+    if boundary.hour:
+        return (UpdatePeriod.SLOT, UpdatePeriod.HOUR)
+    return (UpdatePeriod.SLOT, UpdatePeriod.HOUR, UpdatePeriod.DAY)
+
+
+class TickScheduler:
+    """Wake listeners when the values they depend on can change.
+
+    A single timer runs to the end of the shortest period any listener has,
+    in the forecast timezone, and only the listeners of the periods ending
+    there are called, instead of every sensor polling the clock on its own.
+    """
+
+    def __init__(self, hass: HomeAssistant, timezone: Callable[[], tzinfo]) -> None:
+        """Initialize the scheduler with a getter for the forecast timezone."""
+        self.hass = hass
+        self._timezone = timezone
+        self._listeners: dict[UpdatePeriod, list[CALLBACK_TYPE]] = {
+            period: [] for period in UpdatePeriod
+        }
+        self._unsub: CALLBACK_TYPE | None = None
+        self._boundary: datetime | None = None
+
+    @callback
+    def async_add_listener(
+        self, period: UpdatePeriod, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Call update_callback at the end of every period; return a remover."""
+        self._listeners[period].append(update_callback)
+        self._schedule()
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners[period].remove(update_callback)
+            if not any(self._listeners.values()):
+                self.async_shutdown()
+
+        return remove_listener
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the timer."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _schedule(self) -> None:
+        period = next(
+            (period for period in UpdatePeriod if self._listeners[period]), None
+        )
+        if period is None:
+            return
+
+        boundary = next_boundary(dt_util.utcnow(), self._timezone(), period)
+        if self._unsub is not None:
+            # A listener with a shorter period may need an earlier tick.
+            if self._boundary <= boundary:
+                return
+            self._unsub()
+        self._boundary = boundary
+        self._unsub = async_track_point_in_utc_time(
+            self.hass, self._handle_tick, self._boundary
+        )
+
+    @callback
+    def _handle_tick(self, _now: datetime) -> None:
+        self._unsub = None
+        boundary = self._boundary
+        # Schedule first, so a failing listener cannot stop the clock.
+        self._schedule()
+        for period in due_periods(boundary):
+            for update_callback in list(self._listeners[period]):
+                try:
+                    update_callback()
+                except Exception:
+                    LOGGER.exception("Error updating %s listener", period)